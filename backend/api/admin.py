@@ -1,98 +1,102 @@
 # api/admin.py
 from fastapi import APIRouter, Query, HTTPException
-from db.mongo import users_collection, playlists_collection
 from services.token import get_token
-from datetime import datetime, timezone
-import spotipy
 from services.spotify import get_spotify_client
+from services.artists import get_resolver_totals
+from services.cache import cache_stats
+from services.music.taxonomy import reload_taxonomy
+from services.music.telemetry import (
+    unmapped_genres,
+    top_unmapped_genres,
+    flush_unmapped_genres,
+)
+from services.music.fallback import get_fallback
+from services.playlists import sync_user_playlists
+from services.jobs import job_runner, JOB_WORKERS
+from services.backfill import PLAYLIST_BACKFILL
+from services.ratelimit import spotify_limiter, spotify_endpoints
+from services.poller import now_playing_poller
+from services.live import now_playing_hub
 
 router = APIRouter(tags=["admin"])
 
 
 @router.post("/admin/backfill-playlist-metadata")
-def backfill_playlist_metadata():
-    users = users_collection.find({"playlists.all": {"$exists": True}})
-    updated = 0
+def backfill_playlist_metadata(workers: int = Query(JOB_WORKERS, ge=1, le=64)):
+    job = job_runner.submit(PLAYLIST_BACKFILL.name, workers=workers)
+    return {"status": "started", "job": job}
 
-    for user in users:
-        access_token = user.get("access_token")
-        if not access_token:
-            continue
 
-        sp = spotipy.Spotify(auth=access_token)
-        updated_playlists = []
+@router.get("/admin/jobs")
+def list_jobs(limit: int = Query(20, ge=1, le=100)):
+    return {
+        "jobs": job_runner.list_jobs(limit),
+        "rate_limiter": spotify_limiter.stats(),
+    }
+
+
+@router.get("/admin/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_runner.status(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 
-        for pl in user.get("playlists.all", []):
-            try:
-                playlist = sp.playlist(pl["playlist_id"])
-                pl["track_count"] = playlist["tracks"]["total"]
-                pl["external_url"] = playlist["external_urls"]["spotify"]
-                updated_playlists.append(pl)
-            except Exception as e:
-                print(f"⚠️ Failed to update playlist {pl['playlist_id']}: {e}")
-                continue
+@router.post("/admin/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    if not job_runner.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Job is not running")
+    return job_runner.status(job_id)
 
-        users_collection.update_one(
-            {"user_id": user["user_id"]},
-            {"$set": {"playlists.all": updated_playlists}},
-        )
-        updated += 1
 
-    return {"status": "ok", "users_updated": updated}
+@router.post("/admin/jobs/{job_id}/resume")
+def resume_job(job_id: str):
+    if not job_runner.resume(job_id):
+        raise HTTPException(status_code=409, detail="Job cannot be resumed")
+    return job_runner.status(job_id)
 
 
 @router.post("/admin/sync_playlists")
 def sync_playlists(user_id: str = Query(...)):
     sp = get_spotify_client(user_id)
+    return {"status": "ok", "user_id": user_id, **sync_user_playlists(user_id, sp)}
 
-    all_playlists = []
-    offset = 0
-    limit = 50
-    total_fetched = 0
-
-    user_profile = sp.current_user()
-    spotify_user_id = user_profile["id"]
-
-    while True:
-        page = sp.current_user_playlists(limit=limit, offset=offset)
-        items = page.get("items", [])
-
-        if not items:
-            break
-
-        for p in items:
-            if p["owner"]["id"] != spotify_user_id or p["tracks"]["total"] < 4:
-                continue
-
-            all_playlists.append(
-                {
-                    "id": p["id"],
-                    "name": p["name"],
-                    "tracks": p["tracks"]["total"],
-                    "owner_id": p["owner"]["id"],
-                    "image": p["images"][0]["url"] if p["images"] else None,
-                    "external_url": p["external_urls"]["spotify"],
-                }
-            )
-
-        offset += limit
-        total_fetched += len(items)
-
-    playlists_collection.update_one(
-        {"user_id": user_id},
-        {
-            "$set": {
-                "user_id": user_id,
-                "playlists": all_playlists,
-                "last_updated": datetime.now(timezone.utc),
-            }
-        },
-        upsert=True,
-    )
 
+@router.get("/admin/artist-genre-stats")
+def artist_genre_stats():
+    return get_resolver_totals()
+
+
+@router.get("/admin/spotify-stats")
+def spotify_stats():
     return {
-        "status": "ok",
-        "user_id": user_id,
-        "total_playlists_fetched": total_fetched,
-        "total_playlists_saved": len(all_playlists),
+        "limiter": spotify_limiter.stats(),
+        "endpoints": spotify_endpoints.snapshot(),
     }
+
+
+@router.get("/admin/cache-stats")
+def get_cache_stats():
+    return cache_stats()
+
+
+@router.post("/admin/reload-taxonomy")
+def reload_genre_taxonomy():
+    return {"status": "ok", **reload_taxonomy().stats()}
+
+
+@router.get("/admin/unmapped-genres")
+def get_unmapped_genres(limit: int = Query(50, ge=1, le=500), flush: bool = False):
+    flushed = flush_unmapped_genres() if flush else 0
+    return {
+        "genres": top_unmapped_genres(limit),
+        "flushed": flushed,
+        "tracker": unmapped_genres.stats(),
+        "fallback": get_fallback().stats(),
+    }
+
+
+@router.get("/admin/poller-stats")
+def poller_stats():
+    return {**now_playing_poller.stats(), "streams": now_playing_hub.stats()}
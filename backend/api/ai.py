@@ -1,7 +1,7 @@
 # api/ai.py
 from fastapi import APIRouter, HTTPException, Query
 from openai import OpenAI
-from db.mongo import users_collection
+from db.users import find_user
 import os
 import json
 
@@ -38,7 +38,7 @@ def generate_ai_genre_commentary(user_id: str = Query(...)):
             status_code=503, detail="AI service unavailable: OPENAI_API_KEY not set"
         )
 
-    doc = users_collection.find_one({"user_id": user_id})
+    doc = find_user(user_id, "genres")
     if not doc or "genre_analysis" not in doc:
         raise HTTPException(status_code=404, detail="No genre analysis found for user")
 
@@ -1,14 +1,16 @@
 # api/auth.py
 from fastapi import APIRouter, Request, Query, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
 import base64, json, os
-import spotipy
 from spotipy.exceptions import SpotifyException
 
 from services.spotify_auth import get_spotify_oauth
 from services.cookie import encode, decode
 from db.mongo import users_collection
-from services.token import refresh_user_token
+from db.users import find_user
+from services.token import refresh_user_token, cache_token
+from services.spotify import spotify_for_token
 
 router = APIRouter(tags=["auth"])
 
@@ -48,6 +50,14 @@ async def login():
     return RedirectResponse(auth_url)
 
 
+def _exchange_code(code: str):
+    """Trade the auth code for tokens and fetch the profile (blocking calls)."""
+    sp_oauth = get_spotify_oauth(CALLBACK_URL)
+    token_info = sp_oauth.get_access_token(code, as_dict=True)
+    profile = spotify_for_token(token_info["access_token"]).current_user()
+    return token_info, profile
+
+
 @router.get("/callback")
 async def callback(request: Request):
     code = request.query_params.get("code")
@@ -65,11 +75,11 @@ async def callback(request: Request):
         raise HTTPException(status_code=400, detail=f"State decode error: {e}")
 
     try:
-        sp_oauth = get_spotify_oauth(CALLBACK_URL)
-        token_info = sp_oauth.get_access_token(code, as_dict=True)
-        sp = spotipy.Spotify(auth=token_info["access_token"])
-        profile = sp.current_user()
+        # Off the event loop: the shared limiter may sleep under backoff
+        token_info, profile = await run_in_threadpool(_exchange_code, code)
         user_id = profile.get("id")
+    except HTTPException:
+        raise
     except SpotifyException as e:
         print(f"🙅‍♂️ Token exchange or user fetch failed: {e}")
         if e.http_status == 403:
@@ -86,7 +96,8 @@ async def callback(request: Request):
         raise HTTPException(status_code=400, detail="Spotify user ID missing.")
 
     # Update or create user record
-    users_collection.update_one(
+    await run_in_threadpool(
+        users_collection.update_one,
         {"user_id": user_id},
         {
             "$set": {
@@ -97,6 +108,7 @@ async def callback(request: Request):
         },
         upsert=True,
     )
+    cache_token(user_id, token_info)
 
     # Build redirect response with secure, server-set cookie
     frontend_base = DEV_BASE_URL if IS_DEV else PRO_BASE_URL
@@ -166,8 +178,8 @@ def whoami(request: Request):
             status_code=401,
         )
 
-    user = users_collection.find_one({"user_id": user_id})
-    if not user:
+    user = find_user(user_id, "identity")
+    if user is None:
         print(f"❌ No user found in DB for user_id: {user_id}")
         return JSONResponse(
             {"message": f"User ID from cookie: {user_id} not found in DB"},
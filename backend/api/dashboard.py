@@ -1,6 +1,7 @@
 # api/dashboard.py
 from fastapi import APIRouter, Request, HTTPException
-from db.mongo import users_collection
+from fastapi.concurrency import run_in_threadpool
+from db.users import find_user
 from api.genres import get_genres
 from services.music.track_utils import apply_meta_gradients
 from services.cookie import get_user_id_from_request
@@ -9,12 +10,12 @@ router = APIRouter(tags=["dashboard"])
 
 
 @router.get("/dashboard")
-def get_dashboard(request: Request):
+async def get_dashboard(request: Request):
     user_id = get_user_id_from_request(request)
     print(f"🍪 /dashboard cookie received: sinatra_user_id = {user_id}")
 
-    doc = users_collection.find_one({"user_id": user_id})
-    if not doc:
+    doc = await run_in_threadpool(find_user, user_id, "dashboard")
+    if doc is None:
         print(f"❌ /dashboard: user not found in DB for user_id = {user_id}")
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -31,7 +32,7 @@ def get_dashboard(request: Request):
     ]
 
     print(f"✅ /dashboard success for user_id = {user_id}")
-    genres_data = get_genres(request)
+    genres_data = await get_genres(request)
     last_played = apply_meta_gradients(doc.get("last_played_track", {}))
 
     return {
@@ -1,55 +1,108 @@
 # api/genres.py
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from db.mongo import users_collection
+from db.users import find_user
 from services.token import get_token
-from services.spotify_auth import get_spotify_oauth
+from services.spotify_async import AsyncSpotify
 from services.music import wizard
-from services.music import meta_gradients
 from datetime import datetime, timezone
-from services.music.wizard import get_gradient_for_genre
 from services.music.meta_gradients import gradients
 from fastapi import Request
 from services.token import get_token_by_user_id
 from services.cookie import get_user_id_from_request
+from services.public_cache import invalidate_public_cache
+from services.ratelimit import use_background_priority
 
 
-import os, json, traceback
+import os, traceback, asyncio
 
 router = APIRouter(tags=["genres"])
 
-import json
-from pathlib import Path
+# Top artists come in pages of 50; all four are requested at once
+TOP_ARTISTS_OFFSETS = (0, 50, 100, 150)
+TOP_ARTISTS_FANOUT = int(os.getenv("TOP_ARTISTS_FANOUT", 4))
+TOP_ARTISTS_PAGE_TIMEOUT = float(os.getenv("TOP_ARTISTS_PAGE_TIMEOUT", 5))
 
-GENRE_MAP_PATH = (
-    Path(__file__).resolve().parent.parent / "services" / "music" / "genre-map.json"
-)
+# Stored analyses older than this are served but recomputed in the background
+GENRE_MAX_AGE = int(os.getenv("GENRE_MAX_AGE", 6 * 3600))
+_refreshing = set()
+_refresh_tasks = set()
 
 
 @router.get("/genres")
-def get_genres(request: Request, refresh: bool = False):
+async def get_genres(request: Request, refresh: bool = False):
     user_id = get_user_id_from_request(request)
     try:
-        access_token = get_token(request)
-        return analyze_user_genres(user_id, access_token)
+        if not refresh:
+            doc = await run_in_threadpool(find_user, user_id, "genres")
+            stored = (doc or {}).get("genre_analysis")
+            updated = (doc or {}).get("genre_last_updated")
+            if stored and updated:
+                age = _age_seconds(updated)
+                stale = age > GENRE_MAX_AGE or stored.get("partial", False)
+                if stale:
+                    schedule_genre_refresh(user_id)
+                return _with_age(stored, age, stale)
+
+        access_token = await run_in_threadpool(get_token, request)
+        result = await analyze_user_genres(user_id, access_token)
+        return _with_age(result, 0, False)
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Genre analysis failed: {str(e)}")
 
 
+def _age_seconds(updated: datetime) -> int:
+    if updated.tzinfo is None:
+        updated = updated.replace(tzinfo=timezone.utc)
+    return max(int((datetime.now(timezone.utc) - updated).total_seconds()), 0)
+
+
+def _with_age(analysis: dict, age: int, stale: bool) -> dict:
+    return {**analysis, "analysis_age": age, "stale": stale}
+
+
+def schedule_genre_refresh(user_id: str):
+    """Recompute a stale analysis in the background, once per user at a time."""
+    if user_id in _refreshing:
+        return
+    _refreshing.add(user_id)
+
+    async def refresh():
+        use_background_priority()
+        try:
+            access_token = await run_in_threadpool(get_token_by_user_id, user_id)
+            await analyze_user_genres(user_id, access_token)
+            print(f"🔁 Background genre refresh done for {user_id}")
+        except Exception as e:
+            print(f"⚠️ Background genre refresh failed for {user_id}: {e}")
+        finally:
+            _refreshing.discard(user_id)
+
+    task = asyncio.create_task(refresh())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
 @router.post("/refresh_genres")
-def refresh_genre_analysis(payload: dict):
+async def refresh_genre_analysis(payload: dict):
     user_id = payload.get("user_id")
     if not user_id:
         raise HTTPException(status_code=400, detail="Missing user_id")
 
-    users_collection.update_one(
+    await run_in_threadpool(
+        users_collection.update_one,
         {"user_id": user_id},
         {"$unset": {"genre_analysis": "", "genre_last_updated": ""}},
     )
+    invalidate_public_cache(user_id)
 
     try:
-        access_token = get_token_by_user_id(user_id)
-        return analyze_user_genres(user_id, access_token)
+        access_token = await run_in_threadpool(get_token_by_user_id, user_id)
+        return await analyze_user_genres(user_id, access_token)
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Refresh failed: {str(e)}")
@@ -60,21 +113,45 @@ def get_meta_gradients():
     return gradients
 
 
-def analyze_user_genres(user_id: str, access_token: str):
-    import spotipy
+async def fetch_top_artists(sp: AsyncSpotify):
+    """Fetch the top-artist pages concurrently; returns (artists, failed_offsets)."""
+    semaphore = asyncio.Semaphore(TOP_ARTISTS_FANOUT)
+
+    async def fetch_page(offset: int):
+        async with semaphore:
+            try:
+                batch = await asyncio.wait_for(
+                    sp.current_user_top_artists(
+                        limit=50, offset=offset, time_range="short_term"
+                    ),
+                    timeout=TOP_ARTISTS_PAGE_TIMEOUT,
+                )
+                return batch.get("items", [])
+            except asyncio.TimeoutError:
+                print(f"⏱️ Top artists page at offset {offset} timed out")
+            except Exception as e:
+                print(f"⚠️ Failed to fetch top artists at offset {offset}: {e}")
+            return None
+
+    pages = await asyncio.gather(*(fetch_page(o) for o in TOP_ARTISTS_OFFSETS))
 
-    sp = spotipy.Spotify(auth=access_token)
+    top_artists = []
+    failed_offsets = []
+    for offset, items in zip(TOP_ARTISTS_OFFSETS, pages):
+        if items is None:
+            failed_offsets.append(offset)
+        else:
+            top_artists.extend(items)
+    return top_artists, failed_offsets
+
+
+async def analyze_user_genres(user_id: str, access_token: str):
+    sp = AsyncSpotify(access_token)
 
     # Fetch top 200 artists
-    top_artists = []
-    for offset in (0, 50, 100, 150):
-        try:
-            batch = sp.current_user_top_artists(
-                limit=50, offset=offset, time_range="short_term"
-            )
-            top_artists.extend(batch.get("items", []))
-        except Exception as e:
-            print(f"⚠️ Failed to fetch top artists at offset {offset}: {e}")
+    top_artists, failed_offsets = await fetch_top_artists(sp)
+    if len(failed_offsets) == len(TOP_ARTISTS_OFFSETS):
+        raise HTTPException(status_code=502, detail="Spotify top artists unavailable")
 
     # Extract genres
     flat_genres = []
@@ -86,54 +163,13 @@ def analyze_user_genres(user_id: str, access_token: str):
     raw_highest = wizard.genre_highest(flat_genres)
     sub_genres_raw = wizard.genre_frequency(flat_genres)
 
-    total = sum(raw_highest.values()) or 1
-    meta_genres = {
-        genre: {
-            "portion": round((count / total) * 100, 1),
-            "gradient": get_gradient_for_genre(genre),
-        }
-        for genre, count in raw_highest.items()
-    }
-
-    try:
-        with open(GENRE_MAP_PATH) as f:
-            genre_map = json.load(f)
-    except Exception:
-        raise HTTPException(status_code=500, detail="Failed to load genre map.")
-
-    sub_genres = {}
-    total_subgenre_count = sum(sub_genres_raw.values()) or 1
-    for genre, count in sub_genres_raw.items():
-        portion = round((count / total_subgenre_count) * 100, 1)
-        parent = genre_map.get(genre.lower(), "other")
-        sub_genres[genre] = {
-            "portion": portion,
-            "parent_genre": parent,
-            "gradient": get_gradient_for_genre(parent),
-        }
-
-    sorted_subs = sorted(sub_genres.items(), key=lambda x: -x[1]["portion"])
-    top_sub = next(
-        (g for g, _ in sorted_subs if genre_map.get(g.lower(), "") != g.lower()),
-        sorted_subs[0][0] if sorted_subs else None,
-    )
-    top_meta = genre_map.get(top_sub.lower(), "other") if top_sub else None
-
-    result = {
-        "sub_genres": dict(
-            sorted(sub_genres.items(), key=lambda x: -x[1]["portion"])[:10]
-        ),
-        "meta_genres": dict(
-            sorted(meta_genres.items(), key=lambda x: -x[1]["portion"])[:10]
-        ),
-        "top_subgenre": {
-            "sub_genre": top_sub,
-            "parent_genre": top_meta,
-            "gradient": get_gradient_for_genre(top_meta),
-        },
-    }
+    result = wizard.build_genre_analysis(raw_highest, sub_genres_raw)
+    result["partial"] = bool(failed_offsets)
+    if failed_offsets:
+        result["failed_offsets"] = failed_offsets
 
-    users_collection.update_one(
+    await run_in_threadpool(
+        users_collection.update_one,
         {"user_id": user_id},
         {
             "$set": {
@@ -143,5 +179,6 @@ def analyze_user_genres(user_id: str, access_token: str):
         },
         upsert=True,
     )
+    invalidate_public_cache(user_id)
 
     return result
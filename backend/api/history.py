@@ -0,0 +1,61 @@
+# api/history.py
+import re
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from services.cookie import get_user_id_from_request
+from services.history import get_history
+from services.rollups import load_rollups, summarize
+from services.poller import now_playing_poller
+from services.music.track_utils import apply_meta_gradients_many
+
+router = APIRouter(tags=["history"])
+
+
+def _cursor(played_at: str) -> str:
+    """``next_before`` as a UTC ``...Z`` timestamp, safe unencoded in a URL."""
+    when = datetime.fromisoformat(played_at).astimezone(timezone.utc)
+    return when.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _parse_before(value: str) -> datetime:
+    # An unencoded "+00:00" offset arrives as " 00:00"
+    value = re.sub(r" (\d\d:?\d\d)$", r"+\1", value.strip())
+    when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+
+@router.get("/history")
+async def get_listening_history(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    before: str = Query(None, description="ISO timestamp; page to older listens"),
+):
+    user_id = get_user_id_from_request(request)
+    # Keeps the user on the poller's schedule, which also syncs their history
+    now_playing_poller.touch(user_id)
+
+    try:
+        before_dt = _parse_before(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid 'before' timestamp")
+
+    listens = await run_in_threadpool(get_history, user_id, limit, before_dt)
+    return {
+        "items": apply_meta_gradients_many(listens),
+        "next_before": (
+            _cursor(listens[-1]["played_at"]) if len(listens) == limit else None
+        ),
+    }
+
+
+@router.get("/history/stats")
+async def get_listening_stats(
+    request: Request,
+    period: str = Query("week", pattern="^(day|week)$"),
+    days: int = Query(28, ge=1, le=365),
+):
+    """Plays, top artists and genres from the pre-aggregated rollups."""
+    user_id = get_user_id_from_request(request)
+    rollups = await run_in_threadpool(load_rollups, user_id, period, days)
+    return {"period": period, "days": days, **summarize(rollups)}
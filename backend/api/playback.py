@@ -1,61 +1,44 @@
 # api/playback.py
 from fastapi import APIRouter, Query, Depends, HTTPException, Request
-import spotipy
-from db.mongo import users_collection
+from fastapi.concurrency import run_in_threadpool
+from db.users import find_user, set_last_played_track
 from services.token import get_token
-from services.spotify import build_track_data
+from services.spotify_async import AsyncSpotify, build_track_data_async
 from services.cookie import get_user_id_from_request
+from services.poller import now_playing_poller
 
 router = APIRouter(tags=["playback"])
 
 
 @router.get("/playback")
-def get_playback_state(request: Request, access_token: str = Depends(get_token)):
+async def get_playback_state(request: Request):
     user_id = get_user_id_from_request(request)
 
-    sp = spotipy.Spotify(auth=access_token)
-
     try:
-        playback = sp.current_playback()
-
-        if playback and playback.get("item"):
-            track_data = build_track_data(playback["item"], sp)
-
-            existing = users_collection.find_one(
-                {"user_id": user_id}, {"last_played_track": 1}
-            )
-            if (
-                existing
-                and existing.get("last_played_track", {}).get("id") == track_data["id"]
-            ):
-                print("🟡 Track already stored, skipping update.")
-                return {"status": "unchanged", "track": track_data}
-
-            users_collection.update_one(
-                {"user_id": user_id}, {"$set": {"last_played_track": track_data}}
-            )
-            return {"playback": track_data}
-        else:
-            user = users_collection.find_one({"user_id": user_id})
-            return {"playback": user.get("last_played_track", None)}
-
+        state = await now_playing_poller.current(user_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if state.in_player and not state.take_change():
+        return {"status": "unchanged", "track": state.track}
+    return {"playback": state.track}
+
 
 @router.get("/recently-played")
-def get_recently_played(
+async def get_recently_played(
     request: Request, access_token: str = Depends(get_token), limit: int = 1
 ):
-    sp = spotipy.Spotify(auth=access_token)
+    sp = AsyncSpotify(access_token)
 
     try:
-        recent = sp.current_user_recently_played(limit=limit)
+        recent = await sp.current_user_recently_played(limit=limit)
         if not recent["items"]:
             return {"track": None}
 
         track = recent["items"][0]["track"]
-        track_data = build_track_data(track, sp)
+        track_data = await build_track_data_async(track, sp)
 
         user_id_cookie = request.cookies.get("sinatra_user_id")
         user_id = None
@@ -65,18 +48,12 @@ def get_recently_played(
             except HTTPException:
                 user_id = None
         if user_id:
-            existing = users_collection.find_one(
-                {"user_id": user_id}, {"last_played_track": 1}
+            changed = await run_in_threadpool(
+                set_last_played_track, user_id, track_data
             )
-            if (
-                existing
-                and existing.get("last_played_track", {}).get("id") == track_data["id"]
-            ):
+            if not changed:
                 print("🟡 Track already stored, skipping update.")
                 return {"status": "unchanged", "track": track_data}
-            users_collection.update_one(
-                {"user_id": user_id}, {"$set": {"last_played_track": track_data}}
-            )
 
         return {"track": track_data}
 
@@ -88,66 +65,43 @@ def get_recently_played(
 
 
 @router.get("/now-playing")
-def now_playing(request: Request, access_token: str = Depends(get_token)):
-    sp = spotipy.Spotify(auth=access_token)
+async def now_playing(request: Request):
+    user_id = get_user_id_from_request(request)
 
     try:
-        current = sp.current_playback()
-        if not current or not current.get("item"):
-            return {"track": None}
-
-        track = current["item"]
-        track_data = build_track_data(track, sp)
-
-        return {"track": track_data}
-
+        state = await now_playing_poller.current(user_id)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"⚠️ Now playing error: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch now playing track")
 
+    return {"track": state.track if state.in_player else None}
+
 
 @router.post("/update-playing")
-def update_playing(request: Request, access_token: str = Depends(get_token)):
+async def update_playing(request: Request):
     user_id = get_user_id_from_request(request)
 
-    sp = spotipy.Spotify(auth=access_token)
-
     try:
-        current = sp.current_playback()
-        if not current or not current.get("item"):
-            raise HTTPException(status_code=404, detail="Nothing is currently playing")
-
-        print("🎵 Current playback found")
-        track_data = build_track_data(current["item"], sp)
-        print("✅ Track data built:", track_data["name"], track_data["id"])
-
-        existing = users_collection.find_one(
-            {"user_id": user_id}, {"last_played_track": 1}
-        )
-        if (
-            existing
-            and existing.get("last_played_track", {}).get("id") == track_data["id"]
-        ):
-            print("🟡 Track already stored, skipping update.")
-            return {"status": "unchanged", "track": track_data}
-
-        result = users_collection.update_one(
-            {"user_id": user_id}, {"$set": {"last_played_track": track_data}}
-        )
-        print("✅ Mongo update result:", result.raw_result)
-
-        return {"status": "updated", "track": track_data}
-
+        state = await now_playing_poller.current(user_id)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Update playing error: {e}")
         raise HTTPException(
             status_code=500, detail="Failed to update last played track"
         )
 
+    if not state.in_player:
+        raise HTTPException(status_code=404, detail="Nothing is currently playing")
+    status = "updated" if state.take_change() else "unchanged"
+    return {"status": status, "track": state.track}
+
 
 @router.get("/check-recent")
 def check_recent_track(request: Request):
     user_id = get_user_id_from_request(request)
 
-    user = users_collection.find_one({"user_id": user_id})
-    return {"track": user.get("last_played_track")}
+    user = find_user(user_id, "last_played")
+    return {"track": (user or {}).get("last_played_track")}
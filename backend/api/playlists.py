@@ -7,28 +7,40 @@ from models.playlists import (
     SaveAllPlaylistsRequest,
     FeaturedPlaylistsUpdateRequest,
 )
-from typing import List
-import spotipy
+from typing import List, Optional
 from fastapi import Request, Depends
-from services.token import get_token
+from fastapi.concurrency import run_in_threadpool
+from services.token import get_token, get_token_by_user_id
+from services.spotify_async import AsyncSpotify
+from services.playlists import (
+    add_selected_playlists,
+    enrich_playlists,
+    decode_cursor,
+    page_synced_playlists,
+)
 from models.playlists import FeaturedPlaylistsUpdateRequest
 from services.cookie import get_user_id_from_request
 
 from db.mongo import users_collection, playlists_collection
+from db.users import find_user
 from services.token import get_token
+from services.public_cache import invalidate_public_cache
 
 router = APIRouter(tags=["playlists"])
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 
 @router.get("/playlists")
-def get_playlists(
+async def get_playlists(
     user_id: str = Query(...),
     limit: int = Query(50, ge=1, le=50),
     offset: int = Query(0, ge=0),
 ):
-    access_token = get_token(user_id)
-    sp = spotipy.Spotify(auth=access_token)
-    raw = sp.current_user_playlists(limit=limit, offset=offset)
+    access_token = await run_in_threadpool(get_token_by_user_id, user_id)
+    sp = AsyncSpotify(access_token)
+    raw = await sp.current_user_playlists(limit=limit, offset=offset)
 
     playlists = [
         {
@@ -46,11 +58,8 @@ def get_playlists(
 
 @router.get("/all-playlists")
 def get_all_user_playlists(user_id: str = Query(...)):
-    user = users_collection.find_one({"user_id": user_id}, {"playlists.all": 1})
-    if not user or "playlists.all" not in user:
-        return []
-
-    return user["playlists.all"]
+    user = find_user(user_id, "selected_playlists")
+    return ((user or {}).get("playlists") or {}).get("all", [])
 
 
 @router.post("/add-playlists")
@@ -69,36 +78,19 @@ async def add_playlists(
     if not isinstance(playlists, list) or not all("id" in p for p in playlists):
         raise HTTPException(status_code=400, detail="Invalid playlist data")
 
-    sp = spotipy.Spotify(auth=access_token)
-    enriched = []
-
-    for pl in playlists:
-        try:
-            playlist = sp.playlist(pl["id"])
-            enriched.append(
-                {
-                    "id": pl["id"],
-                    "name": playlist["name"],
-                    "image": (
-                        playlist["images"][0]["url"] if playlist["images"] else None
-                    ),
-                    "tracks": playlist["tracks"]["total"],
-                    "external_url": playlist["external_urls"]["spotify"],
-                }
-            )
-        except Exception as e:
-            print(f"⚠️ Failed to fetch metadata for playlist {pl['id']}: {e}")
+    sp = AsyncSpotify(access_token)
+    enriched, failed = await enrich_playlists(sp, [p["id"] for p in playlists])
 
     if not enriched:
         raise HTTPException(status_code=400, detail="No valid playlists to add")
 
-    result = users_collection.update_one(
-        {"user_id": user_id},
-        {"$addToSet": {"playlists.all": {"$each": enriched}}},
-        upsert=True,
-    )
+    modified = await run_in_threadpool(add_selected_playlists, user_id, enriched)
 
-    return {"status": "added", "modified_count": result.modified_count}
+    return {
+        "status": "added",
+        "modified_count": modified,
+        "failed": failed,
+    }
 
 
 @router.post("/delete-playlists")
@@ -120,10 +112,12 @@ async def delete_playlists(
     playlist_ids = [p["id"] for p in playlists]
     print(f"🗑️ Deleting playlists {playlist_ids} for user {user_id}")
 
-    result = users_collection.update_one(
+    result = await run_in_threadpool(
+        users_collection.update_one,
         {"user_id": user_id},
         {"$pull": {"playlists.all": {"id": {"$in": playlist_ids}}}},
     )
+    invalidate_public_cache(user_id)
 
     return {"status": "deleted", "deleted_count": result.modified_count}
 
@@ -139,8 +133,8 @@ def update_featured_playlists(data: FeaturedPlaylistsUpdateRequest = Body(...)):
     if not user_id or not isinstance(playlist_ids, list):
         raise HTTPException(status_code=400, detail="Invalid input")
 
-    user = users_collection.find_one({"user_id": user_id})
-    if not user:
+    user = find_user(user_id, "playlist_ids")
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
     all_playlists = user.get("playlists", {}).get("all", [])
@@ -151,15 +145,16 @@ def update_featured_playlists(data: FeaturedPlaylistsUpdateRequest = Body(...)):
     users_collection.update_one(
         {"user_id": user_id}, {"$set": {"playlists.featured": normalized_ids}}
     )
+    invalidate_public_cache(user_id)
 
     return {"status": "ok", "count": len(normalized_ids)}
 
 
 @router.get("/playlist-info")
-def get_playlist_info(user_id: str = Query(...), playlist_id: str = Query(...)):
-    access_token = get_token(user_id)
-    sp = spotipy.Spotify(auth=access_token)
-    playlist = sp.playlist(playlist_id)
+async def get_playlist_info(user_id: str = Query(...), playlist_id: str = Query(...)):
+    access_token = await run_in_threadpool(get_token_by_user_id, user_id)
+    sp = AsyncSpotify(access_token)
+    playlist = await sp.playlist(playlist_id, fields="name,images")
 
     return {
         "name": playlist["name"],
@@ -168,8 +163,20 @@ def get_playlist_info(user_id: str = Query(...), playlist_id: str = Query(...)):
 
 
 @router.get("/user-playlists")
-def get_user_playlists(user_id: str = Query(...)):
-    doc = playlists_collection.find_one({"user_id": user_id})
+def get_user_playlists(
+    user_id: str = Query(...),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    if limit is None and cursor is None:
+        doc = playlists_collection.find_one(
+            {"user_id": user_id},
+            {"_id": 0, "user_id": 1, "last_updated": 1, "playlists": 1},
+        )
+        if doc:
+            doc["total"] = len(doc.get("playlists", []))
+    else:
+        doc = _page(user_id, limit or DEFAULT_PAGE_SIZE, 0, cursor)
     if not doc:
         raise HTTPException(
             status_code=404, detail="No synced playlists found for user."
@@ -178,20 +185,35 @@ def get_user_playlists(user_id: str = Query(...)):
     return {
         "user_id": doc["user_id"],
         "last_updated": doc.get("last_updated"),
+        "total": doc["total"],
         "playlists": doc.get("playlists", []),
+        "next_cursor": doc.get("next_cursor"),
     }
 
 
 @router.get("/synced-playlists/paginated")
 def get_paginated_playlists(
-    user_id: str = Query(...), offset: int = 0, limit: int = 50
+    user_id: str = Query(...),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
-    doc = playlists_collection.find_one({"user_id": user_id})
+    doc = _page(user_id, limit, offset, cursor)
     if not doc:
         raise HTTPException(status_code=404, detail="No synced playlists found.")
 
-    all_playlists = doc.get("playlists", [])
-    total = len(all_playlists)
-    sliced = all_playlists[offset : offset + limit]
+    return {
+        "total": doc["total"],
+        "playlists": doc["playlists"],
+        "next_cursor": doc["next_cursor"],
+    }
 
-    return {"total": total, "playlists": sliced}
+
+def _page(user_id: str, limit: int, offset: int, cursor: Optional[str]):
+    after = None
+    if cursor:
+        try:
+            offset, after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return page_synced_playlists(user_id, limit, offset, after)
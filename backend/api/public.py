@@ -1,28 +1,17 @@
 # api/public.py
-from fastapi import APIRouter, HTTPException, Query
-from db.mongo import users_collection
-import spotipy
-from services.token import get_token_by_user_id
-from services.spotify import build_track_data
+from fastapi import APIRouter, HTTPException, Query, Request
+from db.users import find_user
+from services.poller import now_playing_poller
+from services.rollups import history_genre_analysis
+from services.public_cache import cached_public_response
 
 router = APIRouter(tags=["public"])
 
 
 def _build_profile_response(user_id: str):
     """Return the public profile document for the given user."""
-    projection = {
-        "user_id": 1,
-        "display_name": 1,
-        "profile_image_url": 1,
-        "profile_picture": 1,
-        "playlists": 1,
-        "genre_analysis": 1,
-        "genres_analysis": 1,
-        "genres": 1,
-        "last_played_track": 1,
-    }
-    doc = users_collection.find_one({"user_id": user_id}, projection)
-    if not doc:
+    doc = find_user(user_id, "public_profile")
+    if doc is None:
         raise HTTPException(status_code=404, detail="User not found")
 
     playlists_data = doc.get("playlists", {})
@@ -57,21 +46,24 @@ def _build_profile_response(user_id: str):
 
 
 @router.get("/public-profile/{user_id}")
-def get_public_profile(user_id: str):
+def get_public_profile(request: Request, user_id: str):
     """Fetch a user's public profile via path parameter."""
-    return _build_profile_response(user_id)
+    return cached_public_response(
+        request, user_id, "profile", lambda: _build_profile_response(user_id)
+    )
 
 
 @router.get("/public-profile")
-def get_public_profile_query(user_id: str = Query(...)):
+def get_public_profile_query(request: Request, user_id: str = Query(...)):
     """Fetch a user's public profile via query parameter."""
-    return _build_profile_response(user_id)
+    return cached_public_response(
+        request, user_id, "profile", lambda: _build_profile_response(user_id)
+    )
 
 
-@router.get("/public-track/{user_id}")
-def get_public_track(user_id: str):
-    doc = users_collection.find_one({"user_id": user_id}, {"last_played_track": 1})
-    if not doc:
+def _build_track_response(user_id: str):
+    doc = find_user(user_id, "last_played")
+    if doc is None:
         raise HTTPException(status_code=404, detail="User not found")
 
     track = doc.get("last_played_track")
@@ -86,80 +78,91 @@ def get_public_track(user_id: str):
     return {"track": track}
 
 
-@router.get("/public-genres/{user_id}")
-def get_public_genres(user_id: str):
-    doc = users_collection.find_one({"user_id": user_id})
+@router.get("/public-track/{user_id}")
+def get_public_track(request: Request, user_id: str):
+    return cached_public_response(
+        request, user_id, "track", lambda: _build_track_response(user_id)
+    )
+
+
+def _build_genres_response(user_id: str, source: str, days: int):
+    if source == "history":
+        analysis = history_genre_analysis(user_id, days)
+        if not analysis["plays"]:
+            raise HTTPException(status_code=404, detail="No listening history found")
+        return analysis
+
+    doc = find_user(user_id, "genres")
     if not doc or "genre_analysis" not in doc:
         raise HTTPException(status_code=404, detail="No genre data found")
     return doc["genre_analysis"]
 
 
-@router.get("/public-played/{user_id}")
-def get_public_recently_played(user_id: str, limit: int = 1):
-    """Fetch and render a user's most recently played track from a public visitor"""
-    try:
-        access_token = get_token_by_user_id(user_id)
-        sp = spotipy.Spotify(auth=access_token)
+@router.get("/public-genres/{user_id}")
+def get_public_genres(
+    request: Request,
+    user_id: str,
+    source: str = Query("top-artists", pattern="^(top-artists|history)$"),
+    days: int = Query(28, ge=1, le=365),
+):
+    """Stored genre analysis, or with ``source=history`` one built from the
+    user's listening rollups over the last ``days``."""
+    return cached_public_response(
+        request,
+        user_id,
+        f"genres:{source}:{days}",
+        lambda: _build_genres_response(user_id, source, days),
+    )
 
-        recent = sp.current_user_recently_played(limit=limit)
-        if not recent["items"]:
-            return {"track": None}
 
-        track = recent["items"][0]["track"]
-        track_data = build_track_data(track, sp)
+def _track_id(state) -> str:
+    return (state.track or {}).get("id")
 
-        existing = users_collection.find_one(
-            {"user_id": user_id}, {"last_played_track": 1}
-        )
-        if (
-            existing
-            and existing.get("last_played_track", {}).get("id") == track_data["id"]
-        ):
-            print("🟡 Track already stored, skipping update.")
-            return {"status": "unchanged", "track": track_data}
-
-        users_collection.update_one(
-            {"user_id": user_id}, {"$set": {"last_played_track": track_data}}
-        )
 
-        return {"track": track_data}
+@router.get("/public-played/{user_id}")
+async def get_public_recently_played(
+    user_id: str,
+    last_track_id: str = Query(None, description="Track the visitor already shows"),
+):
+    """Render a user's most recently played track for a public visitor.
+
+    Served from the now-playing poller, so visitors don't each reach Spotify.
+    "unchanged" is judged against ``last_track_id``, never the owner's state.
+    """
+    try:
+        state = await now_playing_poller.current(user_id)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"⚠️ Public recently played error: {e}")
         raise HTTPException(
             status_code=500, detail="Failed to fetch recently played track"
         )
 
+    if not state.track:
+        return {"track": None}
+    if last_track_id and last_track_id == _track_id(state):
+        return {"status": "unchanged", "track": state.track}
+    return {"track": state.track}
+
 
 @router.post("/public-update-playing/{user_id}")
-def public_update_playing(user_id: str):
+async def public_update_playing(
+    user_id: str,
+    last_track_id: str = Query(None, description="Track the visitor already shows"),
+):
     """Update a user's recently_played_track on mongo from public"""
     try:
-        access_token = get_token_by_user_id(user_id)
-        sp = spotipy.Spotify(auth=access_token)
-
-        current = sp.current_playback()
-        if not current or not current.get("item"):
-            raise HTTPException(status_code=404, detail="nothing is currently playing")
-
-        track_data = build_track_data(current["item"], sp)
-
-        existing = users_collection.find_one(
-            {"user_id": user_id}, {"last_played_track": 1}
-        )
-        if (
-            existing
-            and existing.get("last_played_track", {}).get("id") == track_data["id"]
-        ):
-            print("🟡 Track already stored, skipping update.")
-            return {"status": "unchanged", "track": track_data}
-
-        users_collection.update_one(
-            {"user_id": user_id}, {"$set": {"last_played_track": track_data}}
-        )
-
-        return {"status": "updated", "track": track_data}
+        state = await now_playing_poller.current(user_id)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"⚠️ Public update playing error: {e}")
         raise HTTPException(
             status_code=500, detail="Failed to update last played track."
         )
+
+    if not state.in_player:
+        raise HTTPException(status_code=404, detail="nothing is currently playing")
+    unchanged = last_track_id and last_track_id == _track_id(state)
+    return {"status": "unchanged" if unchanged else "updated", "track": state.track}
@@ -1,10 +1,11 @@
 # api/spotify.py
 from fastapi import APIRouter, Query, Depends, HTTPException
 from spotipy.exceptions import SpotifyException
-import spotipy
 
-from services.token import get_token
+from services.token import get_token, get_token_by_user_id
+from services.spotify import spotify_for_token
 from services.spotify_auth import get_artist_genres
+from services.artists import ArtistGenreResolver
 
 router = APIRouter(tags=["spotify"])
 
@@ -15,14 +16,19 @@ def get_top_tracks(
     limit: int = 10,
     time_range: str = "medium_term",
 ):
-    sp = spotipy.Spotify(auth=access_token)
+    sp = spotify_for_token(access_token)
     top_tracks = sp.current_user_top_tracks(limit=limit, time_range=time_range)
 
-    artist_genre_cache = {}
+    # Queue every artist up front so genres resolve in one call per 50 artists
+    resolver = ArtistGenreResolver(sp)
+    for track in top_tracks["items"]:
+        resolver.add(track["artists"])
+    resolver.resolve()
+
     simplified = []
 
     for track in top_tracks["items"]:
-        genres = get_artist_genres(sp, track["artists"], artist_genre_cache)
+        genres = get_artist_genres(sp, track["artists"], resolver)
 
         simplified.append(
             {
@@ -41,8 +47,8 @@ def get_top_tracks(
 @router.get("/spotify-me")
 def get_spotify_me(user_id: str = Query(...)):
     try:
-        access_token = get_token(user_id)
-        sp = spotipy.Spotify(auth=access_token)
+        access_token = get_token_by_user_id(user_id)
+        sp = spotify_for_token(access_token)
         return sp.current_user()
     except SpotifyException as e:
         print(f"⚠️ Spotify /me error for {user_id}: {e}")
@@ -0,0 +1,64 @@
+# api/stream.py
+import os
+import json
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from services.cookie import get_user_id_from_request
+from services.poller import now_playing_poller, PlaybackState
+from services.live import now_playing_hub
+
+router = APIRouter(tags=["stream"])
+
+# Comment lines at this interval keep proxies from closing idle streams
+STREAM_KEEPALIVE = float(os.getenv("STREAM_KEEPALIVE", 15))
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _now_playing_events(request: Request, state: PlaybackState):
+    user_id = state.user_id
+    queue = now_playing_hub.subscribe(user_id)
+    try:
+        yield _sse("track", state.event())
+        while not await request.is_disconnected():
+            # An open stream keeps its user on the poller's schedule
+            now_playing_poller.touch(user_id)
+            try:
+                event = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _sse("track", event)
+    finally:
+        now_playing_hub.unsubscribe(user_id, queue)
+
+
+async def _stream_for(request: Request, user_id: str) -> StreamingResponse:
+    try:
+        state = await now_playing_poller.current(user_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"⚠️ Now-playing stream error: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch now playing track")
+
+    return StreamingResponse(
+        _now_playing_events(request, state),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/stream/now-playing")
+async def stream_now_playing(request: Request):
+    """Server-Sent Events of the logged-in user's track changes."""
+    return await _stream_for(request, get_user_id_from_request(request))
+
+
+@router.get("/stream/now-playing/{user_id}")
+async def stream_public_now_playing(request: Request, user_id: str):
+    """Server-Sent Events of a user's track changes, for public profile viewers."""
+    return await _stream_for(request, user_id)
@@ -1,13 +1,19 @@
 # api/user.py
 from fastapi import APIRouter, Request, HTTPException, Query, Body
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from db.mongo import users_collection, playlists_collection
-from services.token import get_token
+from db.users import find_user, set_last_played_track
+from services.token import get_token, get_token_by_user_id, invalidate_token
 from datetime import datetime
-import spotipy
+import asyncio
 from services.cookie import get_user_id_from_request
-from api.genres import get_genres
+from api.genres import get_genres, schedule_genre_refresh
 from services.music.track_utils import apply_meta_gradients
+from services.spotify import spotify_for_token
+from services.spotify_async import AsyncSpotify, build_track_data_async
+from services.playlists import enrich_playlists
+from services.public_cache import invalidate_public_cache
 
 router = APIRouter(tags=["user"])
 
@@ -16,13 +22,13 @@ router = APIRouter(tags=["user"])
 def get_me(request: Request):
     user_id = get_user_id_from_request(request)
 
-    user = users_collection.find_one({"user_id": user_id})
+    user = find_user(user_id, "identity")
 
     if not user or "display_name" not in user:
         # Attempt auto-registration via Spotify API
         try:
             access_token = get_token(request)
-            sp = spotipy.Spotify(auth=access_token)
+            sp = spotify_for_token(access_token)
             sp_user = sp.current_user()
 
             display_name = sp_user["display_name"]
@@ -40,6 +46,7 @@ def get_me(request: Request):
             users_collection.update_one(
                 {"user_id": user_id}, {"$set": new_user}, upsert=True
             )
+            invalidate_public_cache(user_id)
             return new_user
 
         except Exception as e:
@@ -66,7 +73,7 @@ def get_users():
 
 
 @router.post("/register")
-def register_user(data: dict = Body(...)):
+async def register_user(data: dict = Body(...)):
     user_id = data.get("user_id") or data.get("id")
     if not user_id:
         raise HTTPException(status_code=400, detail="Missing user_id")
@@ -76,26 +83,14 @@ def register_user(data: dict = Body(...)):
     selected_playlists = data.get("selected_playlists", [])
     featured_ids = [p.get("id") for p in data.get("featured_playlists", [])]
 
-    sp = spotipy.Spotify(auth=get_token(user_id))
-    enriched = []
+    access_token = await run_in_threadpool(get_token_by_user_id, user_id)
+    sp = AsyncSpotify(access_token)
 
-    for pl in selected_playlists:
-        try:
-            playlist = sp.playlist(pl["id"])
-            enriched.append(
-                {
-                    "id": pl["id"],
-                    "name": playlist["name"],
-                    "image": (
-                        playlist["images"][0]["url"] if playlist["images"] else None
-                    ),
-                    "tracks": playlist["tracks"]["total"],
-                    "external_url": playlist["external_urls"]["spotify"],
-                }
-            )
-        except Exception as e:
-            print(f"⚠️ Failed to enrich playlist {pl['id']}: {e}")
-            continue
+    # Playlist metadata and current playback in one round trip
+    (enriched, failed), playback = await asyncio.gather(
+        enrich_playlists(sp, [pl["id"] for pl in selected_playlists]),
+        _current_playback(sp),
+    )
 
     user_doc = {
         "user_id": user_id,
@@ -109,45 +104,38 @@ def register_user(data: dict = Body(...)):
         "registered": True,
     }
 
-    users_collection.update_one({"user_id": user_id}, {"$set": user_doc}, upsert=True)
+    await run_in_threadpool(
+        users_collection.update_one,
+        {"user_id": user_id},
+        {"$set": user_doc},
+        upsert=True,
+    )
+    invalidate_public_cache(user_id)
 
-    # Optional: trigger last_played and genre analysis
+    # Optional: last played track and genre analysis
     try:
-        from services.music.wizard import genre_highest
-        from api.genres import get_genres
-
-        playback = sp.current_playback()
         if playback and playback.get("item"):
-            artist = playback["item"]["artists"][0]
-            artist_data = sp.artist(artist["id"])
-            track_data = {
-                "track": {
-                    "id": playback["item"]["id"],
-                    "name": playback["item"]["name"],
-                    "artist": artist["name"],
-                    "album": playback["item"]["album"]["name"],
-                    "external_url": playback["item"]["external_urls"]["spotify"],
-                    "album_art_url": (
-                        playback["item"]["album"]["images"][0]["url"]
-                        if playback["item"]["album"]["images"]
-                        else None
-                    ),
-                    "genres": artist_data.get("genres", []),
-                }
-            }
-
-            users_collection.update_one(
-                {"user_id": user_id}, {"$set": {"last_played_track": track_data}}
-            )
+            track_data = await build_track_data_async(playback["item"], sp)
+            await run_in_threadpool(set_last_played_track, user_id, track_data)
     except Exception as e:
-        print("⚠️ Playback fetch failed:", e)
+        print("⚠️ Last played track update failed:", e)
 
+    # The analysis takes several Spotify calls; don't hold up onboarding for it
+    schedule_genre_refresh(user_id)
+
+    return {
+        "status": "success",
+        "message": "User registered and initialized",
+        "failed_playlists": failed,
+    }
+
+
+async def _current_playback(sp: AsyncSpotify):
     try:
-        get_genres(user_id=user_id, refresh=True)
+        return await sp.current_playback()
     except Exception as e:
-        print("⚠️ Genre analysis failed during registration:", e)
-
-    return {"status": "success", "message": "User registered and initialized"}
+        print("⚠️ Playback fetch failed:", e)
+        return None
 
 
 @router.delete("/delete-user")
@@ -156,22 +144,24 @@ def delete_user(request: Request, user_id: str = Query(...)):
 
     users_collection.delete_one({"user_id": user_id})
     playlists_collection.delete_one({"user_id": user_id})
+    invalidate_token(user_id)
+    invalidate_public_cache(user_id)
 
     response = JSONResponse(content={"status": "deleted"})
     response.delete_cookie("sinatra_user_id", path="/")
     return response
 
 @router.get("/session")
-def get_session(request: Request):
+async def get_session(request: Request):
     """Return combined user profile and dashboard data."""
     user_id = get_user_id_from_request(request)
-    user = users_collection.find_one({"user_id": user_id})
+    user = await run_in_threadpool(find_user, user_id, "session")
 
     if not user or "display_name" not in user:
         try:
-            access_token = get_token(request)
-            sp = spotipy.Spotify(auth=access_token)
-            sp_user = sp.current_user()
+            access_token = await run_in_threadpool(get_token, request)
+            sp = AsyncSpotify(access_token)
+            sp_user = await sp.current_user()
 
             display_name = sp_user["display_name"]
             profile_image = (
@@ -185,11 +175,13 @@ def get_session(request: Request):
                 "theme": "default",
             }
 
-            users_collection.update_one(
+            await run_in_threadpool(
+                users_collection.update_one,
                 {"user_id": user_id},
                 {"$set": new_user},
-                upsert=True
+                upsert=True,
             )
+            invalidate_public_cache(user_id)
             user = new_user
         except Exception as e:
             print(f"⚠️ Failed to auto register user {user_id}: {e}")
@@ -207,7 +199,7 @@ def get_session(request: Request):
         playlist_lookup.get(pid) for pid in featured_ids if pid in playlist_lookup
     ]
 
-    genres_data = get_genres(request)
+    genres_data = await get_genres(request)
     last_played = apply_meta_gradients(user.get("last_played_track", {}))
 
     return {
@@ -0,0 +1,24 @@
+# core/lifespan.py
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from services.token import start_token_refresher, stop_token_refresher
+from services.spotify_async import close_async_client
+from services.music.telemetry import start_unmapped_flusher, stop_unmapped_flusher
+from services.poller import now_playing_poller
+from services.jobs import job_runner
+import services.backfill  # registers job kinds before resume_stale
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the app's background workers."""
+    start_token_refresher()
+    start_unmapped_flusher()
+    now_playing_poller.start()
+    job_runner.resume_stale()
+    yield
+    job_runner.stop()
+    await now_playing_poller.stop()
+    stop_token_refresher()
+    stop_unmapped_flusher()
+    await close_async_client()
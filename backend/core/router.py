@@ -15,6 +15,8 @@ from api import (
     spotify,
     public,
     ai,
+    stream,
+    history,
 )
 
 
@@ -32,3 +34,5 @@ def include_routers(app: FastAPI):
     app.include_router(spotify.router)
     app.include_router(public.router)
     app.include_router(ai.router)
+    app.include_router(stream.router)
+    app.include_router(history.router)
@@ -1,6 +1,7 @@
 # db/mongo.py
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo.errors import CollectionInvalid
 from functools import lru_cache
 
 
@@ -21,6 +22,47 @@ def get_db():
 # Collections (access lazily)
 users_collection = get_db().users
 playlists_collection = get_db().playlists
+artists_collection = get_db().artists
+unmapped_genres_collection = get_db().unmapped_genres
+history_collection = get_db().listening_history
+rollups_collection = get_db().listening_rollups
+jobs_collection = get_db().jobs
 
 # Ensure indexes for last lookups
-users_collection.create_index("user_id", unique=True)
\ No newline at end of file
+users_collection.create_index("user_id", unique=True)
+
+# Shared artist-genre cache tier; Mongo drops entries once they go stale
+ARTIST_CACHE_MONGO_TTL = int(os.getenv("ARTIST_CACHE_MONGO_TTL", 7 * 24 * 3600))
+artists_collection.create_index("artist_id", unique=True)
+artists_collection.create_index(
+    [("updated_at", ASCENDING)], expireAfterSeconds=ARTIST_CACHE_MONGO_TTL
+)
+
+# Unmapped-genre telemetry, read back sorted by count
+unmapped_genres_collection.create_index("genre", unique=True)
+unmapped_genres_collection.create_index([("count", DESCENDING)])
+
+# Listening history: a time-series collection, one document per play
+try:
+    get_db().create_collection(
+        "listening_history",
+        timeseries={
+            "timeField": "played_at",
+            "metaField": "user_id",
+            "granularity": "minutes",
+        },
+    )
+except CollectionInvalid:
+    pass  # already exists
+except Exception as e:
+    print(f"⚠️ Could not create listening_history as time series: {e}")
+history_collection.create_index([("user_id", ASCENDING), ("played_at", ASCENDING)])
+
+# Daily/weekly listening aggregates, one document per user, period and bucket
+rollups_collection.create_index(
+    [("user_id", ASCENDING), ("period", ASCENDING), ("start", ASCENDING)],
+    unique=True,
+)
+
+# Background maintenance jobs, listed newest first per kind
+jobs_collection.create_index([("kind", ASCENDING), ("created_at", DESCENDING)])
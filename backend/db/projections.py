@@ -0,0 +1,31 @@
+# db/projections.py
+from typing import Dict
+
+_IDENTITY = {
+    "_id": 0,
+    "user_id": 1,
+    "display_name": 1,
+    "profile_image_url": 1,
+    "profile_picture": 1,
+    "theme": 1,
+}
+
+# What each read path needs; tokens and unrelated subdocuments stay in Mongo.
+# Every view keeps user_id so an existing user never comes back as {}.
+PROJECTIONS: Dict[str, Dict[str, int]] = {
+    "identity": _IDENTITY,
+    "session": {**_IDENTITY, "playlists": 1, "last_played_track": 1},
+    "dashboard": {"_id": 0, "user_id": 1, "playlists": 1, "last_played_track": 1},
+    "public_profile": {
+        **_IDENTITY,
+        "playlists": 1,
+        "genre_analysis": 1,
+        "genres_analysis": 1,
+        "genres": 1,
+        "last_played_track": 1,
+    },
+    "genres": {"_id": 0, "user_id": 1, "genre_analysis": 1, "genre_last_updated": 1},
+    "last_played": {"_id": 0, "user_id": 1, "last_played_track": 1},
+    "playlist_ids": {"_id": 0, "user_id": 1, "playlists.all.id": 1},
+    "selected_playlists": {"_id": 0, "user_id": 1, "playlists.all": 1},
+}
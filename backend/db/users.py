@@ -0,0 +1,51 @@
+# db/users.py
+from typing import Any, Dict, List, Optional, TypedDict
+
+from db.mongo import users_collection
+from db.projections import PROJECTIONS
+from services.public_cache import invalidate_public_cache
+
+
+class PlaylistsDoc(TypedDict, total=False):
+    all: List[Dict[str, Any]]
+    featured: List[str]
+
+
+class UserDoc(TypedDict, total=False):
+    user_id: str
+    display_name: str
+    profile_image_url: Optional[str]
+    profile_picture: Optional[str]
+    theme: str
+    playlists: PlaylistsDoc
+    genre_analysis: Dict[str, Any]
+    genre_last_updated: Any
+    last_played_track: Dict[str, Any]
+    access_token: str
+    refresh_token: str
+    expires_at: int
+
+
+def find_user(user_id: str, view: str) -> Optional[UserDoc]:
+    """Fetch ``user_id`` with only the fields the ``view`` read path uses.
+
+    Returns ``None`` only when the user doesn't exist; check ``is None``, since
+    a user without the projected fields still comes back as a document.
+    """
+    return users_collection.find_one({"user_id": user_id}, PROJECTIONS[view])
+
+
+def set_last_played_track(user_id: str, track: dict) -> bool:
+    """Store ``track`` as the user's last played track unless it already is.
+
+    One conditional update instead of find_one + update_one: the filter only
+    matches when the stored track has a different id (or none), so concurrent
+    writers can't both "change" it. Returns whether anything was written.
+    """
+    result = users_collection.update_one(
+        {"user_id": user_id, "last_played_track.id": {"$ne": track["id"]}},
+        {"$set": {"last_played_track": track}},
+    )
+    if result.modified_count:
+        invalidate_public_cache(user_id)
+    return result.modified_count > 0
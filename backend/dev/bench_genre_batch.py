@@ -0,0 +1,69 @@
+# dev/bench_genre_batch.py
+"""Check GenreBatchEngine against wizard.genre_highest/genre_frequency and time both.
+
+Run from backend/:  python -m dev.bench_genre_batch [users]
+"""
+
+import sys
+import time
+import random
+
+from services.music import wizard
+from services.music.batch import GenreBatchEngine
+from services.music.taxonomy import get_taxonomy
+
+
+def synthetic_users(n_users: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    known = sorted(get_taxonomy().genre_map)
+    unknown = [f"made up genre {i}" for i in range(200)]
+    users = {}
+    for u in range(n_users):
+        # Top-artist genre lists are a few hundred entries with heavy repeats
+        favourites = rng.sample(known, 40) + rng.sample(unknown, 3)
+        genres = [rng.choice(favourites) for _ in range(rng.randint(0, 400))]
+        # Spotify spellings are not always normalized
+        genres = [g.upper() if rng.random() < 0.05 else g for g in genres]
+        users[f"user{u}"] = genres
+    return users
+
+
+def main(n_users: int = 2000):
+    users = synthetic_users(n_users)
+    total = sum(len(g) for g in users.values())
+
+    start = time.perf_counter()
+    expected = {
+        uid: {
+            "highest": wizard.genre_highest(genres),
+            "frequency": wizard.genre_frequency(genres),
+        }
+        for uid, genres in users.items()
+    }
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = GenreBatchEngine()
+    actual = engine.aggregate(users)
+    batch_time = time.perf_counter() - start
+
+    def same(uid, key):
+        # As lists, so the key order must match too
+        return list(actual[uid][key].items()) == list(expected[uid][key].items())
+
+    mismatches = [
+        uid for uid in users if not (same(uid, "highest") and same(uid, "frequency"))
+    ]
+
+    print(f"🎧 {n_users} users, {total} genre entries")
+    print(f"wizard loop   {loop_time * 1000:8.1f} ms")
+    print(f"batch engine  {batch_time * 1000:8.1f} ms  {engine.stats()}")
+    if mismatches:
+        print(f"❌ {len(mismatches)} differ")
+    else:
+        print("✅ identical results")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
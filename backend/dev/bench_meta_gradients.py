@@ -0,0 +1,74 @@
+# dev/bench_meta_gradients.py
+"""Per-track cost of apply_meta_gradients: per-genre lookups vs the precomputed table.
+
+Run from backend/:  python -m dev.bench_meta_gradients [tracks]
+"""
+
+import sys
+import time
+import random
+
+from services.music.taxonomy import get_taxonomy
+from services.music.wizard import get_parent_genre, get_gradient_for_genre
+from services.music.track_utils import apply_meta_gradients, apply_meta_gradients_many
+
+
+def per_genre_lookups(track: dict) -> dict:
+    """The previous implementation, kept here as the baseline."""
+    meta_entries = []
+    seen = set()
+    for genre in track.get("genres") or []:
+        parent = get_parent_genre(genre)
+        if parent in seen:
+            continue
+        meta_entries.append(
+            {"name": parent, "gradient": get_gradient_for_genre(parent)}
+        )
+        seen.add(parent)
+    updated = track.copy()
+    updated["genres"] = meta_entries
+    return updated
+
+
+def synthetic_tracks(n: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    known = sorted(get_taxonomy().genre_map)
+    unknown = [f"made up genre {i}" for i in range(50)]
+    tracks = []
+    for i in range(n):
+        genres = rng.sample(known, rng.randint(0, 6))
+        if rng.random() < 0.2:
+            genres.append(rng.choice(unknown))
+        tracks.append({"id": f"t{i}", "name": f"Track {i}", "genres": genres})
+    return tracks
+
+
+def timed(fn, tracks, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(tracks)
+        best = min(best, time.perf_counter() - start)
+    return best / len(tracks) * 1e6
+
+
+def main(n: int = 20000):
+    tracks = synthetic_tracks(n)
+    # Warm the fallback classifier so every variant sees the same caches
+    per_genre_lookups({"genres": [g for t in tracks for g in t["genres"]]})
+
+    baseline = timed(lambda ts: [per_genre_lookups(t) for t in ts], tracks)
+    single = timed(lambda ts: [apply_meta_gradients(t) for t in ts], tracks)
+    batch = timed(apply_meta_gradients_many, tracks)
+
+    same = [per_genre_lookups(t) for t in tracks] == apply_meta_gradients_many(tracks)
+    print(f"🎨 {n} tracks, {sum(len(t['genres']) for t in tracks)} genres")
+    print(f"per-genre lookups          {baseline:6.2f} µs/track")
+    print(f"apply_meta_gradients       {single:6.2f} µs/track")
+    print(f"apply_meta_gradients_many  {batch:6.2f} µs/track")
+    print("✅ identical results" if same else "❌ results differ")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,89 @@
+# dev/bench_spotify_pool.py
+"""Compare a fresh session per call against the shared Spotify pool.
+
+Runs a keep-alive stub of api.spotify.com on localhost, so the numbers only
+include the TCP handshake; against the real API each new connection also
+pays for TLS, which makes the gap several times larger.
+
+Run from backend/:  python -m dev.bench_spotify_pool [calls]
+"""
+
+import sys
+import json
+import time
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from services.http import build_session, SPOTIFY_TIMEOUT
+
+PAYLOAD = json.dumps({"is_playing": True, "item": {"id": "stub"}}).encode()
+
+
+class StubSpotify(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid Nagle/delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(call, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(
+        f"{label:<22} mean {statistics.mean(samples):6.3f} ms   "
+        f"p50 {statistics.median(samples):6.3f} ms   "
+        f"p95 {sorted(samples)[int(len(samples) * 0.95)]:6.3f} ms"
+    )
+
+
+def main(calls: int = 500):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSpotify)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/me/player"
+    headers = {"Authorization": "Bearer stub"}
+
+    def fresh_session():
+        # What every spotipy.Spotify(auth=...) did: its own session and pool
+        with requests.Session() as session:
+            session.get(url, headers=headers, timeout=SPOTIFY_TIMEOUT)
+
+    # Without the app-wide limiter, which would cap the loop at its rate
+    pooled = build_session(rate_limited=False)
+
+    def shared_pool():
+        pooled.get(url, headers=headers, timeout=SPOTIFY_TIMEOUT)
+
+    shared_pool()  # open the keep-alive connection once
+
+    fresh = timed(fresh_session, calls)
+    shared = timed(shared_pool, calls)
+    server.shutdown()
+
+    print(f"🏁 {calls} GETs against local stub")
+    report("new session per call", fresh)
+    report("shared pooled session", shared)
+    saved = statistics.mean(fresh) - statistics.mean(shared)
+    print(f"⏱️ saved {saved:.3f} ms per call (TCP only, TLS excluded)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
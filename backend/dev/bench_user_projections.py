@@ -0,0 +1,144 @@
+# dev/bench_user_projections.py
+"""Bytes on the wire and BSON decode time per read path, with and without projection.
+
+Builds a synthetic user with 500 playlists and applies each projection from
+db/projections.PROJECTIONS locally (same inclusion rules as Mongo), so no server
+is needed. The BSON size is what find_one would transfer for that user.
+
+Run from backend/:  python -m dev.bench_user_projections [playlists]
+"""
+
+import sys
+import time
+import random
+
+import bson
+
+from db.projections import PROJECTIONS
+
+# Which endpoints use which view
+ENDPOINTS = {
+    "session": "/session",
+    "dashboard": "/dashboard",
+    "public_profile": "/public-profile/{id}",
+    "genres": "/genres, /public-genres, /ai-genres",
+    "last_played": "/check-recent, /public-track",
+    "identity": "/me, /whoami",
+    "playlist_ids": "/update-featured",
+    "selected_playlists": "/all-playlists",
+}
+
+
+def synthetic_user(n_playlists: int, seed: int = 5) -> dict:
+    rng = random.Random(seed)
+    playlists = [
+        {
+            "id": f"{i:022d}",
+            "name": f"Playlist {i} " + "x" * rng.randint(5, 40),
+            "image": f"https://i.scdn.co/image/{rng.getrandbits(128):032x}",
+            "tracks": rng.randint(4, 400),
+            "external_url": f"https://open.spotify.com/playlist/{i:022d}",
+        }
+        for i in range(n_playlists)
+    ]
+    gradient = "linear-gradient(to right, #c94b4b, #ff6f61)"
+    sub = {"portion": 3.2, "parent_genre": "rock", "gradient": gradient}
+    return {
+        "_id": bson.ObjectId(),
+        "user_id": "user",
+        "display_name": "Synthetic User",
+        "profile_image_url": "https://i.scdn.co/image/profile",
+        "theme": "default",
+        "access_token": "A" * 300,
+        "refresh_token": "R" * 130,
+        "expires_at": int(time.time()) + 3600,
+        "playlists": {"all": playlists, "featured": [p["id"] for p in playlists[:3]]},
+        "genre_analysis": {
+            "sub_genres": {f"sub genre {i}": dict(sub) for i in range(10)},
+            "meta_genres": {
+                f"meta {i}": {"portion": 9.1, "gradient": gradient} for i in range(10)
+            },
+            "top_subgenre": {
+                "sub_genre": "sub genre 0",
+                "parent_genre": "rock",
+                "gradient": gradient,
+            },
+        },
+        "genre_last_updated": "2026-01-01T00:00:00+00:00",
+        "last_played_track": {
+            "id": "t" * 22,
+            "name": "Track",
+            "artist": "Artist",
+            "album": "Album",
+            "external_url": "https://open.spotify.com/track/x",
+            "album_art_url": "https://i.scdn.co/image/album",
+            "genres": ["rock", "indie rock"],
+            "timestamp": "2026-01-01T00:00:00+00:00",
+        },
+        "history_cursor": 1767225600000,
+    }
+
+
+def _include(doc, path):
+    head, _, rest = path.partition(".")
+    if head not in doc:
+        return None
+    value = doc[head]
+    if not rest:
+        return value
+    if isinstance(value, list):
+        picked = (_include(x, rest) for x in value if isinstance(x, dict))
+        return [{rest.split(".")[0]: v} for v in picked if v is not None]
+    if isinstance(value, dict):
+        inner = _include(value, rest)
+        return None if inner is None else {rest.split(".")[0]: inner}
+    return None
+
+
+def _merge(into: dict, key: str, value):
+    if isinstance(value, dict) and isinstance(into.get(key), dict):
+        for k, v in value.items():
+            _merge(into[key], k, v)
+    else:
+        into[key] = value
+
+
+def project(doc: dict, projection: dict) -> dict:
+    """Inclusion projection with dotted paths, as find_one applies it."""
+    out = {} if projection.get("_id", 1) == 0 else {"_id": doc["_id"]}
+    for path, flag in projection.items():
+        if path == "_id" or not flag:
+            continue
+        value = _include(doc, path)
+        if value is not None:
+            _merge(out, path.split(".")[0], value)
+    return out
+
+
+def decode_us(raw: bytes, repeat: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        bson.decode(raw)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(n_playlists: int = 500):
+    user = synthetic_user(n_playlists)
+    full = bson.encode(user)
+    full_us = decode_us(full)
+
+    print(f"👤 synthetic user, {n_playlists} playlists")
+    print(f"{'view':18} {'bytes':>9} {'decode µs':>10} {'vs full':>8}  endpoints")
+    print(f"{'(no projection)':18} {len(full):9,d} {full_us:10.1f} {'':>8}")
+    for view, projection in PROJECTIONS.items():
+        raw = bson.encode(project(user, projection))
+        ratio = len(raw) / len(full)
+        print(
+            f"{view:18} {len(raw):9,d} {decode_us(raw):10.1f} {ratio:8.1%}  "
+            f"{ENDPOINTS.get(view, '')}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -9,7 +9,8 @@ load_env()  # ✅ MUST come before importing anything that depends on env vars
 from fastapi import FastAPI
 from core.middleware import add_cors_middleware
 from core.router import include_routers
+from core.lifespan import lifespan
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 add_cors_middleware(app)
 include_routers(app)
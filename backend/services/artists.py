@@ -0,0 +1,234 @@
+# services/artists.py
+import os
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pymongo import UpdateOne
+
+from db.mongo import artists_collection
+from services.cache import TTLCache
+
+# Spotify's several-artists endpoint accepts at most 50 IDs per call
+ARTISTS_BATCH_SIZE = 50
+
+ARTIST_CACHE_SIZE = int(os.getenv("ARTIST_CACHE_SIZE", 20000))
+ARTIST_CACHE_TTL = int(os.getenv("ARTIST_CACHE_TTL", 24 * 3600))
+ARTIST_CACHE_MONGO = os.getenv("ARTIST_CACHE_MONGO", "1") == "1"
+
+# Process-wide totals across every resolver, reported by /admin/artist-genre-stats
+_totals = {"artists_requested": 0, "api_calls": 0}
+_totals_lock = threading.Lock()
+
+
+class ArtistGenreStore:
+    """Process-wide artist → genres cache with an optional Mongo second tier.
+
+    Lookups hit the in-memory LRU first, then the ``artists`` collection in a
+    single ``$in`` query; Mongo hits are promoted back into memory.
+    """
+
+    def __init__(self, memory: TTLCache, collection=None):
+        self.memory = memory
+        self.collection = collection
+        self.mongo_hits = 0
+        self.mongo_misses = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, artist_ids: Iterable[str]) -> Dict[str, List[str]]:
+        found = {}
+        missing = []
+        for artist_id in artist_ids:
+            genres = self.memory.get(artist_id)
+            if genres is None:
+                missing.append(artist_id)
+            else:
+                found[artist_id] = genres
+
+        if missing and self.collection is not None:
+            try:
+                docs = self.collection.find(
+                    {"artist_id": {"$in": missing}},
+                    {"_id": 0, "artist_id": 1, "genres": 1},
+                )
+                for doc in docs:
+                    found[doc["artist_id"]] = doc.get("genres", [])
+                    self.memory.set(doc["artist_id"], found[doc["artist_id"]])
+            except Exception as e:
+                print(f"⚠️ Artist cache read failed: {e}")
+
+            with self._lock:
+                hits = sum(1 for artist_id in missing if artist_id in found)
+                self.mongo_hits += hits
+                self.mongo_misses += len(missing) - hits
+
+        return found
+
+    def put_many(self, genres_by_artist: Dict[str, List[str]]):
+        if not genres_by_artist:
+            return
+        for artist_id, genres in genres_by_artist.items():
+            self.memory.set(artist_id, genres)
+
+        if self.collection is None:
+            return
+        now = datetime.now(timezone.utc)
+        ops = [
+            UpdateOne(
+                {"artist_id": artist_id},
+                {"$set": {"genres": genres, "updated_at": now}},
+                upsert=True,
+            )
+            for artist_id, genres in genres_by_artist.items()
+        ]
+        try:
+            self.collection.bulk_write(ops, ordered=False)
+        except Exception as e:
+            print(f"⚠️ Artist cache write failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "mongo": (
+                {"hits": self.mongo_hits, "misses": self.mongo_misses}
+                if self.collection is not None
+                else None
+            ),
+        }
+
+
+artist_genre_store = ArtistGenreStore(
+    TTLCache(maxsize=ARTIST_CACHE_SIZE, ttl=ARTIST_CACHE_TTL, name="artist_genres"),
+    artists_collection if ARTIST_CACHE_MONGO else None,
+)
+
+
+class ArtistGenreResolver:
+    """Collect artist IDs over a request and resolve their genres in bulk.
+
+    Instead of one ``sp.artist(id)`` per artist, IDs are queued with ``add``
+    and looked up in the shared store first; whatever is left is fetched
+    through ``sp.artists`` in chunks of 50 the first time genres are needed.
+    """
+
+    def __init__(
+        self,
+        sp=None,
+        cache: Optional[Dict[str, List[str]]] = None,
+        store: Optional[ArtistGenreStore] = artist_genre_store,
+    ):
+        self.sp = sp
+        self.cache = cache if cache is not None else {}
+        self.store = store
+        self.pending = {}
+        self.requested = 0
+        self.api_calls = 0
+
+    def add(self, artists: Iterable[dict]) -> "ArtistGenreResolver":
+        for artist in artists:
+            artist_id = artist.get("id") if isinstance(artist, dict) else artist
+            if not artist_id:
+                continue
+            if artist_id not in self.cache and artist_id not in self.pending:
+                self.pending[artist_id] = None
+        return self
+
+    def resolve(self) -> Dict[str, List[str]]:
+        """Serve pending artists from the store, then fetch the rest 50 per call."""
+        self._take_cached(self._lookup_store())
+        fetched = {}
+        for batch in self._batches():
+            response = self.sp.artists(batch)
+            fetched.update(self._record_batch(batch, response))
+        self._save(fetched)
+        return self.cache
+
+    async def resolve_async(self, sp) -> Dict[str, List[str]]:
+        """``resolve`` for the async gateway; batches are fetched concurrently
+        and the blocking store tiers run in the threadpool."""
+        self._take_cached(await run_in_threadpool(self._lookup_store))
+        batches = list(self._batches())
+        responses = await asyncio.gather(*(sp.artists(batch) for batch in batches))
+        fetched = {}
+        for batch, response in zip(batches, responses):
+            fetched.update(self._record_batch(batch, response))
+        await run_in_threadpool(self._save, fetched)
+        return self.cache
+
+    def _lookup_store(self) -> Dict[str, List[str]]:
+        if not self.pending or self.store is None:
+            return {}
+        return self.store.get_many(list(self.pending))
+
+    def _take_cached(self, cached: Dict[str, List[str]]):
+        for artist_id, genres in cached.items():
+            self.cache[artist_id] = genres
+            self.pending.pop(artist_id, None)
+
+    def _batches(self):
+        while self.pending:
+            batch = list(self.pending)[:ARTISTS_BATCH_SIZE]
+            for artist_id in batch:
+                del self.pending[artist_id]
+            yield batch
+
+    def _record_batch(self, batch: List[str], response: Optional[dict]) -> dict:
+        self.requested += len(batch)
+        self.api_calls += 1
+        _record(len(batch))
+        return self._store(batch, (response or {}).get("artists", []))
+
+    def _save(self, fetched: Dict[str, List[str]]):
+        if fetched and self.store is not None:
+            self.store.put_many(fetched)
+
+    def _store(self, batch: List[str], artists: List[Optional[dict]]) -> dict:
+        found = {a["id"]: a.get("genres", []) for a in artists if a}
+        # Unknown IDs come back as null; cache them as genre-less
+        resolved = {artist_id: found.get(artist_id, []) for artist_id in batch}
+        self.cache.update(resolved)
+        return resolved
+
+    def genres_for(self, artists: Iterable[dict]) -> List[str]:
+        """Return the merged genre list for the given artists."""
+        artists = list(artists)
+        self.add(artists)
+        if self.pending:
+            self.resolve()
+
+        genres = []
+        seen = set()
+        for artist in artists:
+            artist_id = artist.get("id") if isinstance(artist, dict) else artist
+            for genre in self.cache.get(artist_id, []):
+                if genre not in seen:
+                    seen.add(genre)
+                    genres.append(genre)
+        return genres
+
+    @property
+    def calls_saved(self) -> int:
+        return max(self.requested - self.api_calls, 0)
+
+    def stats(self) -> dict:
+        return {
+            "artists_requested": self.requested,
+            "api_calls": self.api_calls,
+            "calls_saved": self.calls_saved,
+        }
+
+
+def _record(artists: int):
+    with _totals_lock:
+        _totals["artists_requested"] += artists
+        _totals["api_calls"] += 1
+
+
+def get_resolver_totals() -> dict:
+    with _totals_lock:
+        totals = dict(_totals)
+    totals["calls_saved"] = totals["artists_requested"] - totals["api_calls"]
+    totals["cache"] = artist_genre_store.stats()
+    return totals
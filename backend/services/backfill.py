@@ -0,0 +1,50 @@
+# services/backfill.py
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+from db.mongo import users_collection
+from db.projections import PROJECTIONS
+from services.jobs import JobKind, register_job
+from services.playlists import refresh_selected_playlists
+from services.spotify import spotify_for_token
+from services.token import get_token_by_user_id
+
+_HAS_PLAYLISTS = {"playlists.all.0": {"$exists": True}}
+
+
+def _users_after(after: Optional[str], limit: int) -> List[dict]:
+    query = dict(_HAS_PLAYLISTS)
+    if after is not None:
+        query["user_id"] = {"$gt": after}
+    return list(
+        users_collection.find(query, PROJECTIONS["selected_playlists"])
+        .sort("user_id", 1)
+        .limit(limit)
+    )
+
+
+def backfill_user_playlists(user: dict) -> str:
+    """Refresh one user's selected playlist metadata; returns the outcome."""
+    user_id = user["user_id"]
+    try:
+        access_token = get_token_by_user_id(user_id, remember=False)
+    except HTTPException as e:
+        print(f"⚠️ Skipping playlist backfill for {user_id}: {e.detail}")
+        return "skipped"
+
+    result = refresh_selected_playlists(
+        user_id, user["playlists"]["all"], spotify_for_token(access_token)
+    )
+    return "updated" if result["updated"] else "unchanged"
+
+
+PLAYLIST_BACKFILL = register_job(
+    JobKind(
+        "playlist-backfill",
+        batch=_users_after,
+        handle=backfill_user_playlists,
+        count=lambda: users_collection.count_documents(_HAS_PLAYLISTS),
+        key="user_id",
+    )
+)
@@ -0,0 +1,148 @@
+# services/history.py
+import os
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from pymongo.errors import BulkWriteError
+
+from db.mongo import users_collection, history_collection
+from services.artists import ArtistGenreResolver
+from services.rollups import apply_listens
+
+HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "1") == "1"
+# Sync at least this often while the poller is watching a user
+HISTORY_SYNC_INTERVAL = float(os.getenv("HISTORY_SYNC_INTERVAL", 600))
+
+# Spotify's recently-played endpoint returns at most 50 items per call
+RECENTLY_PLAYED_LIMIT = 50
+
+
+def _parse_played_at(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _to_ms(when: datetime) -> int:
+    return int(when.timestamp() * 1000)
+
+
+def _listen_doc(
+    user_id: str, item: dict, played_at: datetime, genres: List[str]
+) -> dict:
+    track = item["track"]
+    artists = track.get("artists") or []
+    album = track.get("album") or {}
+    return {
+        "user_id": user_id,
+        "played_at": played_at,
+        "track_id": track["id"],
+        "name": track["name"],
+        "artist": artists[0]["name"] if artists else None,
+        "artist_ids": [a["id"] for a in artists if a.get("id")],
+        "album": album.get("name"),
+        "album_art_url": album["images"][0]["url"] if album.get("images") else None,
+        "duration_ms": track.get("duration_ms"),
+        "genres": genres,
+    }
+
+
+def _load_cursor(user_id: str) -> Optional[int]:
+    doc = users_collection.find_one({"user_id": user_id}, {"history_cursor": 1})
+    return (doc or {}).get("history_cursor")
+
+
+def _utc(when: datetime) -> datetime:
+    return when if when.tzinfo else when.replace(tzinfo=timezone.utc)
+
+
+def _unseen(user_id: str, docs: List[dict]) -> List[dict]:
+    """``docs`` not already stored; time series can't have a unique index."""
+    stored = history_collection.find(
+        {"user_id": user_id, "played_at": {"$in": [d["played_at"] for d in docs]}},
+        {"_id": 0, "played_at": 1},
+    )
+    seen = {_to_ms(_utc(d["played_at"])) for d in stored}
+    return [d for d in docs if _to_ms(d["played_at"]) not in seen]
+
+
+def _insert(docs: List[dict]) -> List[dict]:
+    """Insert ``docs`` and return the ones that were actually written."""
+    try:
+        history_collection.insert_many(docs, ordered=False)
+        return docs
+    except BulkWriteError as e:
+        failed = {err["index"] for err in e.details.get("writeErrors", [])}
+        print(f"⚠️ {len(failed)} of {len(docs)} listens failed to store")
+        return [d for i, d in enumerate(docs) if i not in failed]
+
+
+def _store(user_id: str, docs: List[dict], cursor: int) -> List[dict]:
+    """Write the listens not stored yet and fold exactly those into rollups.
+
+    A sync replayed after a partial insert or a failed cursor update skips
+    rows already written, so nothing is counted twice. The cursor only
+    advances once every listen is stored. Returns the inserted documents.
+    """
+    docs = _unseen(user_id, docs) if docs else []
+    inserted = _insert(docs) if docs else []
+    if inserted:
+        try:
+            apply_listens(user_id, inserted)
+        except Exception as e:
+            print(f"⚠️ Listening rollup update failed for {user_id}: {e}")
+    if len(inserted) == len(docs):
+        # $max: a late or repeated sync can never move the cursor backwards
+        users_collection.update_one(
+            {"user_id": user_id}, {"$max": {"history_cursor": cursor}}
+        )
+    return inserted
+
+
+async def sync_history(user_id: str, sp) -> List[dict]:
+    """Append the user's plays since the last sync to listening_history.
+
+    One ``recently-played`` call per sync: the stored ``after`` cursor means
+    only unseen plays come back, however long the user has been away (Spotify
+    keeps the last 50). Plays at or before the cursor are dropped, so a
+    replayed page never duplicates a listen. Returns the inserted documents.
+    """
+    cursor = await run_in_threadpool(_load_cursor, user_id)
+    page = await sp.current_user_recently_played(
+        limit=RECENTLY_PLAYED_LIMIT, after=cursor
+    )
+    items = [i for i in (page or {}).get("items") or [] if i.get("track")]
+
+    listens = {}
+    for item in items:
+        played_at = _parse_played_at(item["played_at"])
+        if cursor is None or _to_ms(played_at) > cursor:
+            listens[played_at] = item
+    if not listens:
+        return []
+
+    resolver = ArtistGenreResolver()
+    for item in listens.values():
+        resolver.add(item["track"].get("artists", [])[:1])
+    await resolver.resolve_async(sp)
+
+    docs = []
+    for played_at, item in sorted(listens.items()):
+        genres = resolver.genres_for(item["track"].get("artists", [])[:1])
+        docs.append(_listen_doc(user_id, item, played_at, genres))
+    return await run_in_threadpool(_store, user_id, docs, _to_ms(max(listens)))
+
+
+def get_history(user_id: str, limit: int = 50, before: datetime = None) -> List[dict]:
+    """Listens newest first, optionally only those before ``before``."""
+    query = {"user_id": user_id}
+    if before is not None:
+        query["played_at"] = {"$lt": before}
+    docs = history_collection.find(query, {"_id": 0}).sort("played_at", -1).limit(limit)
+    listens = []
+    for doc in docs:
+        played_at = doc["played_at"]
+        if played_at.tzinfo is None:
+            played_at = played_at.replace(tzinfo=timezone.utc)
+        doc["played_at"] = played_at.isoformat()
+        listens.append(doc)
+    return listens
@@ -0,0 +1,73 @@
+# services/http.py
+import os
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from services.ratelimit import spotify_limiter, spotify_endpoints, retry_delay
+
+SPOTIFY_POOL_SIZE = int(os.getenv("SPOTIFY_POOL_SIZE", 50))
+SPOTIFY_CONNECT_TIMEOUT = float(os.getenv("SPOTIFY_CONNECT_TIMEOUT", 3.05))
+SPOTIFY_READ_TIMEOUT = float(os.getenv("SPOTIFY_READ_TIMEOUT", 10))
+SPOTIFY_RETRIES = int(os.getenv("SPOTIFY_RETRIES", 3))
+
+SPOTIFY_TIMEOUT = (SPOTIFY_CONNECT_TIMEOUT, SPOTIFY_READ_TIMEOUT)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """Sends every request through the shared Spotify limiter.
+
+    429s are retried here rather than by urllib3 so the wait applies to all
+    callers (``spotify_limiter.throttle``) and shows up in the counters.
+    """
+
+    def send(self, request, **kwargs):
+        path = urlsplit(request.url).path
+        for attempt in range(SPOTIFY_RETRIES + 1):
+            spotify_limiter.acquire()
+            response = super().send(request, **kwargs)
+            spotify_endpoints.record(path, response.status_code)
+            if response.status_code != 429 or attempt == SPOTIFY_RETRIES:
+                return response
+            delay = retry_delay(attempt, response.headers.get("Retry-After"))
+            print(f"⏳ Spotify throttled {path}, backing off {delay:.1f}s")
+            spotify_limiter.throttle(delay)
+            response.close()
+        return response
+
+
+def build_session(
+    pool_size: int = SPOTIFY_POOL_SIZE, rate_limited: bool = True
+) -> requests.Session:
+    """A keep-alive session whose connection pool is shared by every caller.
+
+    Mirrors spotipy's own retry policy, which it only installs on sessions
+    it builds itself; 429s are left to ``RateLimitedAdapter``. Benchmarks
+    pass ``rate_limited=False`` to measure the pool without the limiter.
+    """
+    retry = Retry(
+        total=SPOTIFY_RETRIES,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+        status=SPOTIFY_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+        respect_retry_after_header=False,
+    )
+    adapter_class = RateLimitedAdapter if rate_limited else HTTPAdapter
+    adapter = adapter_class(
+        pool_connections=4, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@lru_cache()
+def get_spotify_session() -> requests.Session:
+    return build_session()
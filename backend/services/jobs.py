@@ -0,0 +1,282 @@
+# services/jobs.py
+import os
+import uuid
+import socket
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from db.mongo import jobs_collection
+from services.ratelimit import BACKGROUND, spotify_priority
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 8))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", 100))
+# A running job that hasn't checkpointed for this long is presumed orphaned
+JOB_LEASE = int(os.getenv("JOB_LEASE", 300))
+JOB_MAX_ERRORS = 20
+
+# Identifies this process as the owner of the jobs it runs
+RUNNER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+# Statuses a job can be (re)started from
+RESUMABLE = ("queued", "interrupted", "failed", "cancelled")
+
+
+class JobKind:
+    """A fleet-wide job: items in ascending ``key`` order, and what to do with each.
+
+    ``batch(after, limit)`` returns the next items after the checkpoint key,
+    ``handle(item)`` processes one and returns an outcome name (counted per
+    job). Handlers must be idempotent: after a crash the last unfinished
+    batch runs again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch: Callable[[Optional[str], int], List[dict]],
+        handle: Callable[[dict], str],
+        count: Callable[[], int],
+        key: str = "_id",
+    ):
+        self.name = name
+        self.batch = batch
+        self.handle = handle
+        self.count = count
+        self.key = key
+
+
+_kinds: Dict[str, JobKind] = {}
+
+
+def register_job(kind: JobKind) -> JobKind:
+    _kinds[kind.name] = kind
+    return kind
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(when: Optional[datetime]) -> Optional[datetime]:
+    if when is not None and when.tzinfo is None:
+        return when.replace(tzinfo=timezone.utc)
+    return when
+
+
+def job_status(job: dict) -> dict:
+    """A job document plus throughput and ETA for the current run."""
+    status = {k: v for k, v in job.items() if k != "_id"}
+    status["job_id"] = job["_id"]
+    run_started = _aware(job.get("run_started_at"))
+    if run_started:
+        end = _aware(job.get("finished_at")) or _now()
+        elapsed = max((end - run_started).total_seconds(), 1e-6)
+        done = job.get("processed", 0) - job.get("run_processed", 0)
+        rate = done / elapsed
+        remaining = max((job.get("total") or 0) - job.get("processed", 0), 0)
+        status["items_per_second"] = round(rate, 2)
+        status["eta_seconds"] = round(remaining / rate) if rate else None
+    return status
+
+
+class JobRunner:
+    """Runs registered jobs in background threads with a bounded worker pool.
+
+    Progress is checkpointed to the ``jobs`` collection after every batch,
+    which also renews the owner's lease. A job stops as soon as a checkpoint
+    no longer matches (cancelled, or taken over after a lost lease), and a
+    job orphaned by a restart is picked up again by ``resume_stale``.
+    """
+
+    def __init__(self):
+        self._stops: Dict[str, threading.Event] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, workers: int = JOB_WORKERS) -> dict:
+        if kind not in _kinds:
+            raise KeyError(kind)
+        job = {
+            "_id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "workers": max(1, workers),
+            "checkpoint": None,
+            "total": None,
+            "processed": 0,
+            "outcomes": {},
+            "errors": [],
+            "created_at": _now(),
+        }
+        jobs_collection.insert_one(job)
+        self._start(job["_id"], RESUMABLE)
+        return self.status(job["_id"])
+
+    def resume(self, job_id: str) -> bool:
+        return self._start(job_id, RESUMABLE)
+
+    def resume_stale(self) -> int:
+        """Restart jobs interrupted by a shutdown or left behind by a crash."""
+        stale = jobs_collection.find(
+            {
+                "$or": [
+                    {"status": "interrupted"},
+                    {"status": "running", "lease_until": {"$lt": _now()}},
+                ]
+            },
+            {"_id": 1},
+        )
+        resumed = 0
+        for job in stale:
+            if self._start(job["_id"], ("interrupted", "running")):
+                resumed += 1
+        if resumed:
+            print(f"🧰 Resumed {resumed} background jobs")
+        return resumed
+
+    def cancel(self, job_id: str) -> bool:
+        result = jobs_collection.update_one(
+            {"_id": job_id, "status": {"$in": ["queued", "running", "interrupted"]}},
+            {"$set": {"status": "cancelled", "finished_at": _now()}},
+        )
+        with self._lock:
+            stop = self._stops.get(job_id)
+        if stop:
+            stop.set()
+        return result.modified_count > 0
+
+    def stop(self, timeout: float = 5):
+        """Stop local jobs at their next batch; they resume on the next start."""
+        with self._lock:
+            running = list(self._stops.items())
+        for job_id, stop in running:
+            stop.set()
+        for job_id, _ in running:
+            thread = self._threads.get(job_id)
+            if thread:
+                thread.join(timeout)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        job = jobs_collection.find_one({"_id": job_id})
+        return job_status(job) if job else None
+
+    def list_jobs(self, limit: int = 20) -> List[dict]:
+        jobs = jobs_collection.find({}).sort("created_at", -1).limit(limit)
+        return [job_status(job) for job in jobs]
+
+    def _claim(self, job_id: str, statuses: Tuple[str, ...]) -> Optional[dict]:
+        now = _now()
+        allowed = [s for s in statuses if s != "running"]
+        claimable = [{"status": {"$in": allowed}}]
+        if "running" in statuses:
+            claimable.append({"status": "running", "lease_until": {"$lt": now}})
+        current = jobs_collection.find_one({"_id": job_id}, {"processed": 1})
+        if current is None:
+            return None
+        return jobs_collection.find_one_and_update(
+            {"_id": job_id, "$or": claimable},
+            {
+                "$set": {
+                    "status": "running",
+                    "owner": RUNNER_ID,
+                    "lease_until": now + timedelta(seconds=JOB_LEASE),
+                    "run_started_at": now,
+                    "run_processed": current.get("processed", 0),
+                    "finished_at": None,
+                }
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _start(self, job_id: str, statuses: Tuple[str, ...]) -> bool:
+        job = self._claim(job_id, statuses)
+        if job is None:
+            return False
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._run, args=(job, stop), name=f"job-{job['kind']}", daemon=True
+        )
+        with self._lock:
+            self._stops[job_id] = stop
+            self._threads[job_id] = thread
+        thread.start()
+        return True
+
+    def _checkpoint(self, job_id: str, update: dict) -> bool:
+        """Apply ``update`` if this runner still owns the job; renews the lease."""
+        update.setdefault("$set", {})["lease_until"] = _now() + timedelta(
+            seconds=JOB_LEASE
+        )
+        result = jobs_collection.update_one(
+            {"_id": job_id, "owner": RUNNER_ID, "status": "running"}, update
+        )
+        return result.matched_count > 0
+
+    def _run(self, job: dict, stop: threading.Event):
+        job_id = job["_id"]
+        kind = _kinds.get(job["kind"])
+        try:
+            if kind is None:
+                raise KeyError(f"unknown job kind {job['kind']}")
+            if job.get("total") is None:
+                self._checkpoint(job_id, {"$set": {"total": kind.count()}})
+            checkpoint = job.get("checkpoint")
+            print(f"🧰 Job {job_id} ({kind.name}) running from {checkpoint}")
+
+            final = "done"
+            with ThreadPoolExecutor(job["workers"]) as pool:
+                while True:
+                    if stop.is_set():
+                        final = "interrupted"
+                        break
+                    items = kind.batch(checkpoint, JOB_BATCH_SIZE)
+                    if not items:
+                        break
+                    results = list(pool.map(lambda item: _handle(kind, item), items))
+                    checkpoint = items[-1][kind.key]
+                    if not self._checkpoint(job_id, _progress(checkpoint, results)):
+                        return  # cancelled or taken over elsewhere
+
+            self._checkpoint(job_id, {"$set": {"status": final, "finished_at": _now()}})
+            print(f"🧰 Job {job_id} ({kind.name}) {final}")
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {e}")
+            self._checkpoint(
+                job_id,
+                {"$set": {"status": "failed", "error": str(e), "finished_at": _now()}},
+            )
+        finally:
+            with self._lock:
+                self._stops.pop(job_id, None)
+                self._threads.pop(job_id, None)
+
+
+def _handle(kind: JobKind, item: dict) -> Tuple[str, Optional[dict]]:
+    try:
+        with spotify_priority(BACKGROUND):
+            return kind.handle(item), None
+    except Exception as e:
+        return "failed", {"key": item.get(kind.key), "error": str(e)[:300]}
+
+
+def _progress(checkpoint: str, results: List[Tuple[str, Optional[dict]]]) -> dict:
+    outcomes = Counter(outcome for outcome, _ in results)
+    errors = [error for _, error in results if error]
+    update = {
+        "$set": {"checkpoint": checkpoint, "updated_at": _now()},
+        "$inc": {
+            "processed": len(results),
+            **{f"outcomes.{name}": n for name, n in outcomes.items()},
+        },
+    }
+    if errors:
+        update["$push"] = {"errors": {"$each": errors, "$slice": -JOB_MAX_ERRORS}}
+    return update
+
+
+job_runner = JobRunner()
@@ -0,0 +1,56 @@
+# services/live.py
+import asyncio
+from typing import Dict, Set
+
+
+class NowPlayingHub:
+    """Fan out now-playing changes to every connected stream.
+
+    The poller publishes once per change; each subscriber gets its own
+    one-slot queue holding only the latest event, so a slow client can
+    never hold up the poller or make memory grow.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def has_subscribers(self, user_id: str) -> bool:
+        return bool(self._subscribers.get(user_id))
+
+    def publish(self, user_id: str, event: dict):
+        queues = self._subscribers.get(user_id)
+        if not queues:
+            return
+        self.published += 1
+        for queue in queues:
+            if queue.full():
+                # Replace the undelivered event; only the latest matters
+                queue.get_nowait()
+            queue.put_nowait(event)
+            self.delivered += 1
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._subscribers),
+            "connections": sum(len(q) for q in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+now_playing_hub = NowPlayingHub()
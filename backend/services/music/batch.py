@@ -0,0 +1,140 @@
+# services/music/batch.py
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .taxonomy import GenreTaxonomy, get_taxonomy
+from .fallback import GENRE_FALLBACK, get_fallback
+from .wizard import build_genre_analysis
+
+OTHER = "other"
+
+
+class GenreBatchEngine:
+    """Aggregate genre histograms for many users at once.
+
+    Genres are interned to integer IDs (seeded with every genre in the
+    taxonomy), so the per-user ``genre_highest``/``genre_frequency`` loops
+    become a handful of NumPy sorts and bincounts over one flat array.
+    Results, including the order of ties, match the wizard functions.
+    """
+
+    def __init__(self, taxonomy: GenreTaxonomy = None):
+        self.taxonomy = taxonomy or get_taxonomy()
+        self._fallback = get_fallback(self.taxonomy) if GENRE_FALLBACK else None
+
+        parents = sorted(set(self.taxonomy.genre_map.values()) | {OTHER})
+        self.parent_names: List[str] = parents
+        self._parent_ids = {name: i for i, name in enumerate(parents)}
+
+        # Clean (stripped, lowercased) genre → ID, plus per-ID lookup tables
+        self.genre_names: List[str] = []
+        self._clean_ids: Dict[str, int] = {}
+        self._parent_of: List[int] = []
+        self._is_meta: List[bool] = []
+        # Raw spelling → clean ID, so strip().lower() runs once per spelling
+        self._raw_ids: Dict[str, int] = {}
+        self.unmapped = 0
+
+        for genre in self.taxonomy.genre_map:
+            self._intern_clean(genre)
+
+    def _intern_clean(self, clean: str) -> int:
+        genre_id = self._clean_ids.get(clean)
+        if genre_id is None:
+            genre_id = len(self.genre_names)
+            self._clean_ids[clean] = genre_id
+            self.genre_names.append(clean)
+            parent = self.taxonomy.genre_map.get(clean)
+            if parent is None:
+                self.unmapped += 1
+                if self._fallback is not None:
+                    parent = self._fallback.classify(clean)
+                parent = parent or OTHER
+            self._parent_of.append(self._parent_ids[parent])
+            self._is_meta.append(clean in self.taxonomy.meta_genres)
+        return genre_id
+
+    def intern(self, genre: str) -> int:
+        genre_id = self._raw_ids.get(genre)
+        if genre_id is None:
+            genre_id = self._raw_ids[genre] = self._intern_clean(genre.strip().lower())
+        return genre_id
+
+    def _flatten(self, users: Dict[str, List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        lengths = [len(genres) for genres in users.values()]
+        flat = [g for genres in users.values() for g in genres]
+        for spelling in set(flat).difference(self._raw_ids):
+            self.intern(spelling)
+        ids = np.fromiter(
+            map(self._raw_ids.__getitem__, flat), dtype=np.int64, count=len(flat)
+        )
+        owners = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        return ids, owners
+
+    def aggregate(
+        self, users: Dict[str, List[str]], limit: int = 20
+    ) -> Dict[str, Dict[str, dict]]:
+        """Return ``{user_id: {"highest": ..., "frequency": ...}}`` where the
+        two dicts equal ``genre_highest(genres)`` and
+        ``genre_frequency(genres, limit)``.
+        """
+        user_ids = list(users)
+        ids, owners = self._flatten(users)
+        results = {uid: {"highest": {}, "frequency": {}} for uid in user_ids}
+        if ids.size == 0:
+            return results
+
+        positions = np.arange(ids.size, dtype=np.int64)
+        parent_of = np.asarray(self._parent_of, dtype=np.int64)
+        is_meta = np.asarray(self._is_meta, dtype=bool)
+
+        # Meta-genre histogram: one bincount over (user, parent) cells
+        n_parents = len(self.parent_names)
+        cells = owners * n_parents + parent_of[ids]
+        counts = np.bincount(cells, minlength=len(user_ids) * n_parents)
+        first = np.full(counts.size, ids.size, dtype=np.int64)
+        np.minimum.at(first, cells, positions)
+        hit = np.flatnonzero(counts)
+        # Count descending, ties by first appearance (what sorted() keeps)
+        order = np.lexsort((first[hit], -counts[hit], hit // n_parents))
+        for cell in hit[order]:
+            user, parent = divmod(int(cell), n_parents)
+            results[user_ids[user]]["highest"][self.parent_names[parent]] = int(
+                counts[cell]
+            )
+
+        # Sub-genre histogram, meta-genres excluded, top `limit` per user
+        keep = ~is_meta[ids]
+        n_genres = len(self.genre_names)
+        sub_cells = owners[keep] * n_genres + ids[keep]
+        if sub_cells.size:
+            uniq, first_idx, sub_counts = np.unique(
+                sub_cells, return_index=True, return_counts=True
+            )
+            sub_owner = uniq // n_genres
+            order = np.lexsort((first_idx, -sub_counts, sub_owner))
+            ranked_owner = sub_owner[order]
+            group_start = np.searchsorted(ranked_owner, ranked_owner, side="left")
+            rank = np.arange(order.size) - group_start
+            for i in order[rank < limit]:
+                user, genre = divmod(int(uniq[i]), n_genres)
+                results[user_ids[user]]["frequency"][self.genre_names[genre]] = int(
+                    sub_counts[i]
+                )
+
+        return results
+
+    def analyses(self, users: Dict[str, List[str]]) -> Dict[str, dict]:
+        """Stored ``genre_analysis`` documents for every user (e.g. nightly)."""
+        return {
+            uid: build_genre_analysis(agg["highest"], agg["frequency"])
+            for uid, agg in self.aggregate(users).items()
+        }
+
+    def stats(self) -> dict:
+        return {
+            "genres_interned": len(self.genre_names),
+            "spellings": len(self._raw_ids),
+            "unmapped": self.unmapped,
+        }
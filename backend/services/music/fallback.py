@@ -0,0 +1,108 @@
+# services/music/fallback.py
+import os
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .taxonomy import GenreTaxonomy, get_taxonomy
+
+GENRE_FALLBACK = os.getenv("GENRE_FALLBACK", "1") == "1"
+GENRE_FALLBACK_CACHE_SIZE = int(os.getenv("GENRE_FALLBACK_CACHE_SIZE", 10000))
+
+# A token only votes when most known genres containing it share a parent
+TOKEN_MIN_SUPPORT = 3
+TOKEN_MIN_PURITY = 0.75
+# Winning parent needs this much of the total vote
+VOTE_MIN_SHARE = 0.5
+
+_TOKEN_RE = re.compile(r"[a-z0-9&'+]+")
+
+
+def tokenize(genre: str) -> List[str]:
+    return _TOKEN_RE.findall(genre.lower())
+
+
+class FallbackClassifier:
+    """Guess a parent for genres missing from the taxonomy.
+
+    1. Suffix rule: the longest trailing run of words that is itself a known
+       genre decides ("finnish melodic death metal" → "melodic death metal").
+    2. Token vote: each word with a clear parent among known genres votes
+       for it, weighted by how clear it is ("xyz trap" → hip hop).
+
+    Indexes are built once per taxonomy; results are memoized in a bounded
+    LRU, so repeat lookups are one cache hit.
+    """
+
+    def __init__(
+        self, taxonomy: GenreTaxonomy, cache_size: int = GENRE_FALLBACK_CACHE_SIZE
+    ):
+        self.taxonomy = taxonomy
+        self.token_parents = self._build_token_index(taxonomy.genre_map)
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    @staticmethod
+    def _build_token_index(genre_map) -> Dict[str, Tuple[str, float]]:
+        votes = defaultdict(Counter)
+        for genre, parent in genre_map.items():
+            for token in set(tokenize(genre)):
+                votes[token][parent] += 1
+
+        index = {}
+        for token, parents in votes.items():
+            support = sum(parents.values())
+            parent, count = parents.most_common(1)[0]
+            purity = count / support
+            if support >= TOKEN_MIN_SUPPORT and purity >= TOKEN_MIN_PURITY:
+                index[token] = (parent, purity)
+        return index
+
+    def _classify(self, genre: str) -> Optional[str]:
+        """Parent for a stripped, lowercased genre, or None if nothing fits."""
+        words = genre.split()
+        genre_map = self.taxonomy.genre_map
+        for start in range(1, len(words)):
+            parent = genre_map.get(" ".join(words[start:]))
+            if parent is not None:
+                return parent
+
+        votes = Counter()
+        for token in tokenize(genre):
+            hit = self.token_parents.get(token)
+            if hit is not None:
+                votes[hit[0]] += hit[1]
+        if not votes:
+            return None
+        parent, score = votes.most_common(1)[0]
+        return parent if score / sum(votes.values()) > VOTE_MIN_SHARE else None
+
+    def stats(self) -> dict:
+        info = self.classify.cache_info()
+        return {
+            "tokens_indexed": len(self.token_parents),
+            "cache_size": info.currsize,
+            "cache_hits": info.hits,
+            "cache_misses": info.misses,
+        }
+
+
+_classifier: Optional[FallbackClassifier] = None
+
+
+def get_fallback(taxonomy: GenreTaxonomy = None) -> FallbackClassifier:
+    """The classifier for the current taxonomy; rebuilt after a reload."""
+    global _classifier
+    taxonomy = taxonomy or get_taxonomy()
+    classifier = _classifier
+    if classifier is None or classifier.taxonomy is not taxonomy:
+        classifier = FallbackClassifier(taxonomy)
+        if taxonomy is get_taxonomy():
+            _classifier = classifier
+    return classifier
+
+
+def classify_unmapped(genre: str, taxonomy: GenreTaxonomy = None) -> Optional[str]:
+    if not GENRE_FALLBACK:
+        return None
+    return get_fallback(taxonomy).classify(genre)
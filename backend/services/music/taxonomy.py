@@ -0,0 +1,160 @@
+# services/music/taxonomy.py
+import os
+import json
+import pickle
+import threading
+from types import MappingProxyType
+from typing import Dict, Iterable, Optional
+
+from .meta_gradients import gradients as META_GRADIENTS
+
+MUSIC_DIR = os.path.dirname(__file__)
+GENRE_MAP_PATH = os.path.join(MUSIC_DIR, "genre-map.json")
+META_GENRES_PATH = os.path.join(MUSIC_DIR, "meta-genres.json")
+ARTIFACT_PATH = os.getenv(
+    "GENRE_TAXONOMY_ARTIFACT", os.path.join(MUSIC_DIR, "genre-taxonomy.pkl")
+)
+ARTIFACT_VERSION = 1
+
+DEFAULT_GRADIENT = "linear-gradient(to right, #666, #999)"
+
+
+class GenreTaxonomy:
+    """Read-only view of genre-map.json, meta-genres.json and the gradients.
+
+    Keys and values are stripped and lowercased once at build time, and every
+    parent genre maps to itself, so lookups are a single dict access.
+    """
+
+    def __init__(
+        self,
+        genre_map: Dict[str, str],
+        meta_genres: Iterable[str],
+        gradients: Dict[str, str],
+        source: str = "json",
+    ):
+        members = {}
+        for sub, parent in genre_map.items():
+            members.setdefault(parent, set()).add(sub)
+
+        self.genre_map = MappingProxyType(dict(genre_map))
+        self.meta_genres = frozenset(meta_genres)
+        self.gradients = MappingProxyType(dict(gradients))
+        self._members = MappingProxyType(
+            {parent: frozenset(subs) for parent, subs in members.items()}
+        )
+        # sub-genre → (parent, parent's gradient) for apply_meta_gradients.
+        # Only the bound .get is exposed: read-only, and much cheaper to call
+        # than a lookup through MappingProxyType on the hot path.
+        meta_table = {
+            sub: (parent, self.gradient_for(parent))
+            for sub, parent in self.genre_map.items()
+        }
+        self.meta_entry = meta_table.get
+        self.source = source
+
+    def parent_of(self, genre: str, default: Optional[str] = "other") -> Optional[str]:
+        return self.genre_map.get(genre.strip().lower(), default)
+
+    def is_meta(self, name: str) -> bool:
+        return name.lower() in self.meta_genres
+
+    def members(self, parent: str) -> frozenset:
+        return self._members.get(parent.lower(), frozenset())
+
+    def gradient_for(self, name: str) -> str:
+        return self.gradients.get(name.lower(), DEFAULT_GRADIENT)
+
+    def __contains__(self, genre: str) -> bool:
+        return genre.strip().lower() in self.genre_map
+
+    def __len__(self) -> int:
+        return len(self.genre_map)
+
+    def stats(self) -> dict:
+        return {
+            "genres": len(self.genre_map),
+            "parents": len(self._members),
+            "meta_genres": len(self.meta_genres),
+            "source": self.source,
+        }
+
+
+def _normalize(raw_map: dict) -> Dict[str, str]:
+    genre_map = {k.strip().lower(): v.strip().lower() for k, v in raw_map.items()}
+    # 🧠 Ensure all parent genres are mapped to themselves
+    for parent in set(genre_map.values()):
+        genre_map.setdefault(parent, parent)
+    return genre_map
+
+
+def _read_sources() -> dict:
+    with open(GENRE_MAP_PATH) as f:
+        genre_map = _normalize(json.load(f))
+
+    meta_genres = []
+    if os.path.exists(META_GENRES_PATH):
+        with open(META_GENRES_PATH) as f:
+            meta_genres = sorted({g.strip().lower() for g in json.load(f)})
+
+    return {
+        "version": ARTIFACT_VERSION,
+        "genre_map": genre_map,
+        "meta_genres": meta_genres,
+    }
+
+
+def _artifact_is_fresh(path: str) -> bool:
+    if not os.path.exists(path):
+        return False
+    built = os.path.getmtime(path)
+    sources = [GENRE_MAP_PATH, META_GENRES_PATH]
+    return all(built >= os.path.getmtime(p) for p in sources if os.path.exists(p))
+
+
+def compile_taxonomy(path: str = ARTIFACT_PATH) -> str:
+    """Write the normalized taxonomy as a compact pickle for fast startup."""
+    with open(path, "wb") as f:
+        pickle.dump(_read_sources(), f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def load_taxonomy(path: str = ARTIFACT_PATH) -> GenreTaxonomy:
+    """Load from the precompiled artifact when it is newer than the JSON files."""
+    if _artifact_is_fresh(path):
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+            if data.get("version") == ARTIFACT_VERSION:
+                return GenreTaxonomy(
+                    data["genre_map"],
+                    data["meta_genres"],
+                    META_GRADIENTS,
+                    source="artifact",
+                )
+        except Exception as e:
+            print(f"⚠️ Genre taxonomy artifact unreadable, using JSON: {e}")
+
+    data = _read_sources()
+    return GenreTaxonomy(data["genre_map"], data["meta_genres"], META_GRADIENTS)
+
+
+_taxonomy = load_taxonomy()
+_reload_lock = threading.Lock()
+
+
+def get_taxonomy() -> GenreTaxonomy:
+    return _taxonomy
+
+
+def reload_taxonomy() -> GenreTaxonomy:
+    """Rebuild from disk and swap it in; readers keep whichever object they hold."""
+    global _taxonomy
+    with _reload_lock:
+        _taxonomy = load_taxonomy()
+    return _taxonomy
+
+
+if __name__ == "__main__":
+    # python -m services.music.taxonomy  →  writes genre-taxonomy.pkl
+    print(f"📦 Wrote {compile_taxonomy()}")
@@ -0,0 +1,211 @@
+# services/music/telemetry.py
+import os
+import heapq
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from pymongo import UpdateOne
+
+# Unmapped genres are counted with Space-Saving: at most this many counters,
+# each with an overestimate bound, so memory stays flat however many
+# distinct genres Spotify returns.
+UNMAPPED_GENRE_CAPACITY = int(os.getenv("UNMAPPED_GENRE_CAPACITY", 1000))
+# Record only this fraction of lookups; counts are scaled back up
+UNMAPPED_GENRE_SAMPLE_RATE = float(os.getenv("UNMAPPED_GENRE_SAMPLE_RATE", 0.25))
+UNMAPPED_GENRE_FLUSH_INTERVAL = int(os.getenv("UNMAPPED_GENRE_FLUSH_INTERVAL", 300))
+
+
+class HeavyHitters:
+    """Bounded, approximate top-k counter (Space-Saving).
+
+    When full, a new key replaces the smallest counter and inherits its
+    count as error, so a key's true count lies in ``[count - error, count]``
+    and every key seen more than ``total / capacity`` times is kept.
+
+    The smallest counter is found through a lazy min-heap of ``(count, key)``:
+    updates push a new entry and stale ones are skipped on eviction, so
+    ``add`` stays O(log capacity) amortised instead of scanning every counter.
+    """
+
+    def __init__(
+        self, capacity: int = UNMAPPED_GENRE_CAPACITY, sample_rate: float = 1.0
+    ):
+        self.capacity = max(capacity, 1)
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self._weight = 1 / self.sample_rate if self.sample_rate else 0
+        self._counts: Dict[str, float] = {}
+        self._errors: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self.seen = 0
+        self.sampled = 0
+        self.replaced = 0
+
+    def add(self, key: str, count: int = 1):
+        sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+        weight = count * self._weight
+
+        with self._lock:
+            self.seen += count
+            if not sampled:
+                return
+            self.sampled += 1
+            if key in self._counts:
+                self._set(key, self._counts[key] + weight)
+                return
+            if len(self._counts) < self.capacity:
+                self._errors[key] = 0
+                self._set(key, weight)
+                return
+            victim, floor = self._pop_min()
+            del self._counts[victim]
+            del self._errors[victim]
+            self._errors[key] = floor
+            self._set(key, floor + weight)
+            self.replaced += 1
+
+    def _set(self, key: str, count: float):
+        # Caller holds the lock
+        self._counts[key] = count
+        heapq.heappush(self._heap, (count, key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, k) for k, c in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[str, float]:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self._counts.get(key) == count:
+                return key, count
+
+    def top(self, n: int = 50) -> List[Tuple[str, int, int]]:
+        """``(key, estimated count, max overestimate)``, highest first."""
+        with self._lock:
+            items = sorted(self._counts.items(), key=lambda kv: -kv[1])[:n]
+            return [(k, round(c), round(self._errors[k])) for k, c in items]
+
+    def drain(self) -> Dict[str, Tuple[float, float]]:
+        """Return every counter and start a fresh window."""
+        with self._lock:
+            snapshot = {k: (c, self._errors[k]) for k, c in self._counts.items()}
+            self._counts = {}
+            self._errors = {}
+            self._heap = []
+            return snapshot
+
+    def merge(self, snapshot: Dict[str, Tuple[float, float]]):
+        """Put a drained window back, e.g. after a failed flush."""
+        with self._lock:
+            for key, (count, error) in snapshot.items():
+                if key in self._counts:
+                    self._errors[key] += error
+                    self._set(key, self._counts[key] + count)
+                elif len(self._counts) < self.capacity:
+                    self._errors[key] = error
+                    self._set(key, count)
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def stats(self) -> dict:
+        return {
+            "tracked": len(self._counts),
+            "capacity": self.capacity,
+            "sample_rate": self.sample_rate,
+            "seen": self.seen,
+            "sampled": self.sampled,
+            "replaced": self.replaced,
+        }
+
+
+unmapped_genres = HeavyHitters(UNMAPPED_GENRE_CAPACITY, UNMAPPED_GENRE_SAMPLE_RATE)
+
+
+def record_unmapped(genre: str, count: int = 1):
+    unmapped_genres.add(genre, count)
+
+
+def _collection():
+    # Imported lazily so the music package stays usable without Mongo (dev scripts)
+    from db.mongo import unmapped_genres_collection
+
+    return unmapped_genres_collection
+
+
+def flush_unmapped_genres() -> int:
+    """Add the current window's counts to Mongo in one bulk write."""
+    window = unmapped_genres.drain()
+    if not window:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne(
+            {"genre": genre},
+            {
+                "$inc": {"count": round(count), "error": round(error)},
+                "$set": {"last_seen": now},
+                "$setOnInsert": {"first_seen": now},
+            },
+            upsert=True,
+        )
+        for genre, (count, error) in window.items()
+    ]
+    try:
+        _collection().bulk_write(ops, ordered=False)
+    except Exception as e:
+        print(f"⚠️ Unmapped genre flush failed: {e}")
+        unmapped_genres.merge(window)
+        return 0
+    return len(ops)
+
+
+def top_unmapped_genres(limit: int = 50) -> List[dict]:
+    """Stored totals plus the not-yet-flushed window, highest first."""
+    totals = {}
+    try:
+        docs = (
+            _collection()
+            .find({}, {"_id": 0, "genre": 1, "count": 1, "error": 1, "last_seen": 1})
+            .sort("count", -1)
+            .limit(limit)
+        )
+        totals = {doc["genre"]: doc for doc in docs}
+    except Exception as e:
+        print(f"⚠️ Unmapped genre read failed: {e}")
+
+    for genre, count, error in unmapped_genres.top(limit):
+        doc = totals.setdefault(genre, {"genre": genre, "count": 0, "error": 0})
+        doc["count"] += count
+        doc["error"] += error
+
+    return sorted(totals.values(), key=lambda d: -d["count"])[:limit]
+
+
+_flusher_stop = threading.Event()
+_flusher_thread = None
+
+
+def _flush_loop():
+    while not _flusher_stop.wait(UNMAPPED_GENRE_FLUSH_INTERVAL):
+        count = flush_unmapped_genres()
+        if count:
+            print(f"🏷️ Flushed {count} unmapped genres")
+
+
+def start_unmapped_flusher():
+    global _flusher_thread
+    if _flusher_thread and _flusher_thread.is_alive():
+        return
+    _flusher_stop.clear()
+    _flusher_thread = threading.Thread(
+        target=_flush_loop, name="unmapped-genre-flusher", daemon=True
+    )
+    _flusher_thread.start()
+
+
+def stop_unmapped_flusher():
+    _flusher_stop.set()
+    flush_unmapped_genres()
@@ -1,30 +1,52 @@
 # services/music/track_utils.py
 
-from typing import Dict, List
+from typing import Dict, Iterable, List, Tuple
+from .taxonomy import get_taxonomy
 from .wizard import get_parent_genre, get_gradient_for_genre
 
 
-def apply_meta_gradients(track: Dict) -> Dict:
-    """Return a copy of the track with genres mapped to meta genres with gradients."""
-    if not isinstance(track, dict):
-        return track
+def _meta_entry(
+    genre: str, lookup, memo: Dict[str, Tuple[str, str]]
+) -> Tuple[str, str]:
+    entry = memo.get(genre)
+    if entry is None:
+        entry = lookup(genre.strip().lower())
+        if entry is None:
+            parent = get_parent_genre(genre)
+            entry = (parent, get_gradient_for_genre(parent))
+        memo[genre] = entry
+    return entry
 
-    raw_genres: List[str] = track.get("genres") or []
+
+def _with_meta_genres(track: Dict, lookup, memo) -> Dict:
     meta_entries = []
     seen = set()
 
-    for genre in raw_genres:
-        parent = get_parent_genre(genre)
+    for genre in track.get("genres") or []:
+        # Spotify genres are already lowercase, so the raw string usually hits
+        parent, gradient = lookup(genre) or _meta_entry(genre, lookup, memo)
         if parent in seen:
             continue
-        meta_entries.append(
-            {
-                "name": parent,
-                "gradient": get_gradient_for_genre(parent),
-            }
-        )
+        meta_entries.append({"name": parent, "gradient": gradient})
         seen.add(parent)
 
-    updated = track.copy()
-    updated["genres"] = meta_entries
-    return updated
+    return {**track, "genres": meta_entries}
+
+
+def apply_meta_gradients(track: Dict) -> Dict:
+    """Return a copy of the track with genres mapped to meta genres with gradients."""
+    if not isinstance(track, dict):
+        return track
+    return _with_meta_genres(track, get_taxonomy().meta_entry, {})
+
+
+def apply_meta_gradients_many(tracks: Iterable[Dict]) -> List[Dict]:
+    """``apply_meta_gradients`` for a list of tracks, sharing one lookup pass.
+
+    Genres outside the taxonomy are classified once for the whole batch.
+    """
+    lookup = get_taxonomy().meta_entry
+    memo = {}
+    return [
+        _with_meta_genres(t, lookup, memo) if isinstance(t, dict) else t for t in tracks
+    ]
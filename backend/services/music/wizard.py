@@ -1,63 +1,48 @@
-import os
-import json
-import logging
 from collections import defaultdict, Counter
-from .meta_gradients import gradients
-
-logging.basicConfig(level=logging.INFO)
-
-# 🔁 Load genre-map.json
-genre_map_path = os.path.join(os.path.dirname(__file__), "genre-map.json")
-with open(genre_map_path) as f:
-    raw_map = json.load(f)
-
-# 🔁 Normalize keys and values
-GENRE_MAP = {k.strip().lower(): v.strip().lower() for k, v in raw_map.items()}
-
-# 🧠 Ensure all parent genres are mapped to themselves
-for parent in set(GENRE_MAP.values()):
-    if parent not in GENRE_MAP:
-        GENRE_MAP[parent] = parent
+from .taxonomy import get_taxonomy
+from .telemetry import record_unmapped
+from .fallback import classify_unmapped
 
 
 def filter_sub_genres(genre_list):
     """Exclude any genre that is a known meta-genre."""
-    return [g for g in genre_list if g.lower() not in META_GENRES]
-
-
-# Optional: Load meta-genres.json for is_meta_genre()
-meta_genre_path = os.path.join(os.path.dirname(__file__), "meta-genres.json")
-if os.path.exists(meta_genre_path):
-    with open(meta_genre_path) as f:
-        META_GENRES = set(g.strip().lower() for g in json.load(f))
-else:
-    META_GENRES = set()
-
-UNCATEGORIZED_GENRES = defaultdict(int)
+    meta_genres = get_taxonomy().meta_genres
+    return [g for g in genre_list if g.lower() not in meta_genres]
 
 
 def get_parent_genre(genre: str) -> str:
     genre_lc = genre.strip().lower()
-    if genre_lc in GENRE_MAP:
-        return GENRE_MAP[genre_lc]
+    parent = get_taxonomy().genre_map.get(genre_lc)
+    if parent is not None:
+        return parent
     else:
-        UNCATEGORIZED_GENRES[genre_lc] += 1
-        logging.info(f"Unmapped genre: '{genre_lc}'")
-        return "other"
+        # Still counted as unmapped, so genre-map.json keeps growing
+        record_unmapped(genre_lc)
+        return classify_unmapped(genre_lc) or "other"
+
+
+def classify_genre(genre: str) -> str:
+    """``get_parent_genre`` without the unmapped-genre telemetry."""
+    genre_lc = genre.strip().lower()
+    parent = get_taxonomy().genre_map.get(genre_lc)
+    if parent is None:
+        parent = classify_unmapped(genre_lc) or "other"
+    return parent
 
 
 def is_meta_genre(name: str) -> bool:
-    return name.lower() in META_GENRES
+    return get_taxonomy().is_meta(name)
 
 
 def genre_frequency(genre_inputs, limit=20):
     if not isinstance(genre_inputs, list):
         raise ValueError("Expected a list of genres.")
 
+    meta_genres = get_taxonomy().meta_genres
     frequency_counter = Counter()
     for genre in genre_inputs:
         genre_clean = genre.strip().lower()
-        if genre_clean not in META_GENRES:
+        if genre_clean not in meta_genres:
             frequency_counter[genre_clean] += 1
 
     top_genres = frequency_counter.most_common(limit)
@@ -73,18 +58,9 @@ def genre_highest(genre_inputs):
         raise ValueError("genre_inputs must be a list or a dict.")
 
     result = defaultdict(int)
-    OTHER_GENRES = defaultdict(int)
 
     for genre, count in inputs.items():
-        parent = get_parent_genre(genre)
-        result[parent] += count
-        if parent == "other":
-            OTHER_GENRES[genre] += count
-
-    if OTHER_GENRES:
-        logging.info("🚨 Genres categorized as 'other':")
-        for g, c in sorted(OTHER_GENRES.items(), key=lambda x: -x[1]):
-            logging.info(f"  '{g}' → other (x{c})")
+        result[get_parent_genre(genre)] += count
 
     return dict(sorted(result.items(), key=lambda item: item[1], reverse=True))
 
@@ -111,4 +87,48 @@ def generate_user_summary(highest_genres: dict, total: int = None):
 
 
 def get_gradient_for_genre(name: str) -> str:
-    return gradients.get(name.lower(), "linear-gradient(to right, #666, #999)")
+    return get_taxonomy().gradient_for(name)
+
+
+def build_genre_analysis(raw_highest: dict, sub_genres_raw: dict) -> dict:
+    """Shape genre_highest/genre_frequency counts into the stored genre_analysis."""
+    total = sum(raw_highest.values()) or 1
+    meta_genres = {
+        genre: {
+            "portion": round((count / total) * 100, 1),
+            "gradient": get_gradient_for_genre(genre),
+        }
+        for genre, count in raw_highest.items()
+    }
+
+    taxonomy = get_taxonomy()
+
+    sub_genres = {}
+    total_subgenre_count = sum(sub_genres_raw.values()) or 1
+    for genre, count in sub_genres_raw.items():
+        portion = round((count / total_subgenre_count) * 100, 1)
+        parent = classify_genre(genre)
+        sub_genres[genre] = {
+            "portion": portion,
+            "parent_genre": parent,
+            "gradient": get_gradient_for_genre(parent),
+        }
+
+    sorted_subs = sorted(sub_genres.items(), key=lambda x: -x[1]["portion"])
+    top_sub = next(
+        (g for g, _ in sorted_subs if taxonomy.parent_of(g, "") != g.lower()),
+        sorted_subs[0][0] if sorted_subs else None,
+    )
+    top_meta = classify_genre(top_sub) if top_sub else None
+
+    return {
+        "sub_genres": dict(sorted_subs[:10]),
+        "meta_genres": dict(
+            sorted(meta_genres.items(), key=lambda x: -x[1]["portion"])[:10]
+        ),
+        "top_subgenre": {
+            "sub_genre": top_sub,
+            "parent_genre": top_meta,
+            "gradient": get_gradient_for_genre(top_meta or "other"),
+        },
+    }
@@ -0,0 +1,308 @@
+# services/playlists.py
+import os
+import json
+import base64
+import asyncio
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from spotipy.exceptions import SpotifyException
+
+from db.mongo import users_collection, playlists_collection
+from services.public_cache import invalidate_public_cache
+
+# Everything a stored playlist summary needs; skips the first page of tracks
+PLAYLIST_FIELDS = "id,name,images,tracks.total,external_urls,snapshot_id"
+PLAYLIST_ENRICH_CONCURRENCY = int(os.getenv("PLAYLIST_ENRICH_CONCURRENCY", 10))
+
+# current_user_playlists page size (Spotify's maximum)
+PLAYLISTS_PAGE_SIZE = 50
+# Synced playlists shorter than this are left out
+SYNC_MIN_TRACKS = int(os.getenv("SYNC_MIN_TRACKS", 4))
+
+
+def playlist_summary(playlist: dict) -> dict:
+    """The ``playlists.all`` entry stored for a Spotify playlist object."""
+    images = playlist.get("images") or []
+    return {
+        "id": playlist["id"],
+        "name": playlist["name"],
+        "image": images[0]["url"] if images else None,
+        "tracks": playlist["tracks"]["total"],
+        "external_url": playlist["external_urls"]["spotify"],
+        "snapshot_id": playlist.get("snapshot_id"),
+    }
+
+
+async def enrich_playlists(
+    sp, playlist_ids: Iterable[str], concurrency: int = PLAYLIST_ENRICH_CONCURRENCY
+) -> Tuple[List[dict], List[dict]]:
+    """Fetch summaries for ``playlist_ids`` concurrently on an ``AsyncSpotify``.
+
+    At most ``concurrency`` requests are in flight; 429s are retried after
+    Retry-After by the client. Returns ``(enriched, failed)`` in input order,
+    where each failure is ``{"id", "status", "error"}``.
+    """
+    ids = list(dict.fromkeys(playlist_ids))
+    gate = asyncio.Semaphore(max(concurrency, 1))
+
+    async def fetch(playlist_id: str):
+        async with gate:
+            playlist = await sp.playlist(playlist_id, fields=PLAYLIST_FIELDS)
+        return playlist_summary({**playlist, "id": playlist_id})
+
+    results = await asyncio.gather(*(fetch(i) for i in ids), return_exceptions=True)
+
+    enriched, failed = [], []
+    for playlist_id, result in zip(ids, results):
+        if isinstance(result, Exception):
+            status = getattr(result, "http_status", None)
+            error = result.msg if isinstance(result, SpotifyException) else str(result)
+            print(f"⚠️ Failed to fetch playlist {playlist_id}: {error}")
+            failed.append({"id": playlist_id, "status": status, "error": error})
+        else:
+            enriched.append(result)
+    return enriched, failed
+
+
+def iter_user_playlists(sp) -> Iterator[dict]:
+    """Every playlist in the user's library, one ``current_user_playlists`` pass."""
+    offset = 0
+    while True:
+        page = sp.current_user_playlists(limit=PLAYLISTS_PAGE_SIZE, offset=offset)
+        yield from (p for p in page.get("items") or [] if p)
+        if not page.get("next"):
+            return
+        offset += PLAYLISTS_PAGE_SIZE
+
+
+def _synced_entry(playlist: dict) -> dict:
+    return {**playlist_summary(playlist), "owner_id": playlist["owner"]["id"]}
+
+
+def diff_playlists(
+    stored: List[dict], fresh: List[dict]
+) -> Tuple[List[dict], List[dict], List[str]]:
+    """``(added, changed, removed_ids)`` between stored and listed playlists.
+
+    The listing already carries each ``snapshot_id``, which moves whenever a
+    playlist's tracks or details change, so nothing is fetched to compare.
+    """
+    by_id = {p["id"]: p for p in stored}
+    added, changed = [], []
+    for entry in fresh:
+        old = by_id.pop(entry["id"], None)
+        if old is None:
+            added.append(entry)
+        elif old != entry:  # includes snapshot_id
+            changed.append(entry)
+    return added, changed, list(by_id)
+
+
+def sync_user_playlists(user_id: str, sp) -> dict:
+    """Bring ``playlists_collection`` in line with the user's own playlists.
+
+    Only the difference is written: removed playlists are pulled, changed
+    ones replaced in place and new ones pushed to the front, in one ordered
+    bulk write. An unchanged library costs the paging pass and no writes.
+    """
+    spotify_user_id = sp.current_user()["id"]
+    fetched = 0
+    fresh = []
+    for p in iter_user_playlists(sp):
+        fetched += 1
+        owned = p["owner"]["id"] == spotify_user_id
+        if owned and p["tracks"]["total"] >= SYNC_MIN_TRACKS:
+            fresh.append(_synced_entry(p))
+
+    doc = playlists_collection.find_one({"user_id": user_id}, {"playlists": 1})
+    stored = (doc or {}).get("playlists", [])
+    added, changed, removed = diff_playlists(stored, fresh)
+
+    ops = []
+    if removed:
+        ops.append(
+            UpdateOne(
+                {"user_id": user_id},
+                {"$pull": {"playlists": {"id": {"$in": removed}}}},
+            )
+        )
+    for entry in changed:
+        ops.append(
+            UpdateOne(
+                {"user_id": user_id, "playlists.id": entry["id"]},
+                {"$set": {"playlists.$": entry}},
+            )
+        )
+    if added:
+        ops.append(
+            UpdateOne(
+                {"user_id": user_id},
+                {"$push": {"playlists": {"$each": added, "$position": 0}}},
+                upsert=True,
+            )
+        )
+    if ops:
+        ops.append(
+            UpdateOne(
+                {"user_id": user_id},
+                {"$set": {"last_updated": datetime.now(timezone.utc)}},
+                upsert=True,
+            )
+        )
+        playlists_collection.bulk_write(ops, ordered=True)
+
+    return {
+        "total_playlists_fetched": fetched,
+        "total_playlists_saved": len(fresh),
+        "added": len(added),
+        "changed": len(changed),
+        "removed": len(removed),
+        "writes": len(ops),
+    }
+
+
+def add_selected_playlists(user_id: str, entries: List[dict]) -> int:
+    """Add ``entries`` to a user's ``playlists.all``, one entry per id.
+
+    Playlists already there are updated in place (keeping any extra fields)
+    and only new ids are pushed, so a changed ``snapshot_id`` never leaves a
+    second copy behind. Returns the number of writes that changed something.
+    """
+    ops = [
+        UpdateOne(
+            {"user_id": user_id}, {"$setOnInsert": {"user_id": user_id}}, upsert=True
+        )
+    ]
+    for entry in entries:
+        ops.append(
+            UpdateOne(
+                {"user_id": user_id, "playlists.all.id": entry["id"]},
+                {"$set": {f"playlists.all.$.{k}": v for k, v in entry.items()}},
+            )
+        )
+        ops.append(
+            UpdateOne(
+                {"user_id": user_id, "playlists.all.id": {"$ne": entry["id"]}},
+                {"$push": {"playlists.all": entry}},
+            )
+        )
+    result = users_collection.bulk_write(ops, ordered=True)
+    invalidate_public_cache(user_id)
+    return result.modified_count
+
+
+def refresh_selected_playlists(user_id: str, selected: List[dict], sp) -> dict:
+    """Refresh the metadata of a user's ``playlists.all`` from their library.
+
+    Playlists in the library are compared by snapshot from the listing; only
+    selected playlists the user no longer follows are fetched one by one.
+    Entries that changed are replaced in place; the rest are not written.
+    """
+    wanted = {p["id"] for p in selected if p.get("id")}
+    listed = {}
+    for p in iter_user_playlists(sp):
+        if p["id"] in wanted:
+            listed[p["id"]] = playlist_summary(p)
+
+    fetched = failed = 0
+    ops = []
+    for entry in selected:
+        playlist_id = entry.get("id")
+        if not playlist_id:
+            continue
+        fresh = listed.get(playlist_id)
+        if fresh is None:
+            try:
+                fetched += 1
+                fresh = playlist_summary(
+                    sp.playlist(playlist_id, fields=PLAYLIST_FIELDS)
+                )
+            except Exception as e:
+                failed += 1
+                print(f"⚠️ Failed to update playlist {playlist_id}: {e}")
+                continue
+        if any(entry.get(k) != v for k, v in fresh.items()):
+            ops.append(
+                UpdateOne(
+                    {"user_id": user_id, "playlists.all.id": playlist_id},
+                    {"$set": {"playlists.all.$": {**entry, **fresh}}},
+                )
+            )
+
+    if ops:
+        users_collection.bulk_write(ops, ordered=False)
+        invalidate_public_cache(user_id)
+    return {"updated": len(ops), "fetched": fetched, "failed": failed}
+
+
+def encode_cursor(offset: int, last_id: Optional[str]) -> str:
+    """Opaque page token: the next position and the id just before it."""
+    raw = json.dumps({"o": offset, "a": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Optional[str]]:
+    """Inverse of ``encode_cursor``; raises ``ValueError`` on a bad token."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        offset, last_id = int(data["o"]), data.get("a")
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if offset < 0 or not (last_id is None or isinstance(last_id, str)):
+        raise ValueError("invalid cursor")
+    return offset, last_id
+
+
+def _cursor_start(user_id: str, after: str, offset: int) -> int:
+    """Position just past playlist ``after``, or ``offset`` if it is gone."""
+    ids = {"$ifNull": ["$playlists.id", []]}
+    doc = next(
+        playlists_collection.aggregate(
+            [
+                {"$match": {"user_id": user_id}},
+                {"$project": {"_id": 0, "index": {"$indexOfArray": [ids, after]}}},
+            ]
+        ),
+        None,
+    )
+    index = (doc or {}).get("index", -1)
+    return index + 1 if index is not None and index >= 0 else offset
+
+
+def page_synced_playlists(
+    user_id: str, limit: int, offset: int = 0, after: Optional[str] = None
+) -> Optional[dict]:
+    """One page of a user's synced playlists, sliced inside Mongo.
+
+    Only the page and the array's length come back over the wire. With
+    ``after`` (the last id of the previous page) the page starts right after
+    that playlist even if the array shifted since, falling back to
+    ``offset`` when it is gone. Returns ``None`` if nothing was synced.
+    """
+    start = offset if after is None else _cursor_start(user_id, after, offset)
+    playlists = {"$ifNull": ["$playlists", []]}
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {
+            "$project": {
+                "_id": 0,
+                "user_id": 1,
+                "last_updated": 1,
+                "total": {"$size": playlists},
+                "playlists": {"$slice": [playlists, start, limit]},
+            }
+        },
+    ]
+    doc = next(playlists_collection.aggregate(pipeline), None)
+    if doc is None:
+        return None
+
+    page = doc["playlists"]
+    end = start + len(page)
+    doc["next_cursor"] = (
+        encode_cursor(end, page[-1]["id"]) if page and end < doc["total"] else None
+    )
+    return doc
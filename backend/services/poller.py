@@ -0,0 +1,306 @@
+# services/poller.py
+import os
+import time
+import asyncio
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from db.users import find_user, set_last_played_track
+from services.token import get_token_by_user_id
+from services.spotify_async import AsyncSpotify, build_track_data_async
+from services.live import now_playing_hub
+from services.history import HISTORY_ENABLED, HISTORY_SYNC_INTERVAL, sync_history
+from services.ratelimit import use_background_priority
+
+POLLER_ENABLED = os.getenv("POLLER_ENABLED", "1") == "1"
+# Seconds between polls while something is playing (never past the track's end)
+POLLER_PLAYING_INTERVAL = float(os.getenv("POLLER_PLAYING_INTERVAL", 10))
+# Idle users start here and back off exponentially up to the max
+POLLER_IDLE_INTERVAL = float(os.getenv("POLLER_IDLE_INTERVAL", 30))
+POLLER_IDLE_MAX_INTERVAL = float(os.getenv("POLLER_IDLE_MAX_INTERVAL", 300))
+# Users nobody has asked about for this long are dropped from the schedule
+POLLER_ACTIVE_WINDOW = float(os.getenv("POLLER_ACTIVE_WINDOW", 900))
+POLLER_CONCURRENCY = int(os.getenv("POLLER_CONCURRENCY", 20))
+POLLER_TICK = float(os.getenv("POLLER_TICK", 1))
+# After a failed poll, wait this long (doubling per failure, up to the idle max)
+POLLER_ERROR_INTERVAL = float(os.getenv("POLLER_ERROR_INTERVAL", 15))
+# How often touch() drops inactive users when the background loop isn't running
+POLLER_PRUNE_INTERVAL = 60
+
+MIN_INTERVAL = 2
+
+
+class PlaybackState:
+    """Last known playback for one user, as seen by the poller."""
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        # A track is loaded in the player (possibly paused)
+        self.in_player = False
+        self.is_playing = False
+        self.track: Optional[dict] = None
+        # A poll stored a new track that no caller has reported yet
+        self.changed = False
+        self.polled_at = 0.0
+        self.next_poll_at = 0.0
+        self.idle_polls = 0
+        self.last_seen = time.monotonic()
+        self.error: Optional[str] = None
+        self.failure: Optional[Exception] = None
+        self.error_polls = 0
+        self.history_synced_at = 0.0
+
+    def schedule(self, now: float, progress_ms: int = None, duration_ms: int = None):
+        if self.is_playing:
+            self.idle_polls = 0
+            interval = POLLER_PLAYING_INTERVAL
+            if progress_ms is not None and duration_ms:
+                # Look again just after the current track ends
+                remaining = (duration_ms - progress_ms) / 1000 + 1
+                interval = max(min(interval, remaining), MIN_INTERVAL)
+        else:
+            interval = min(
+                POLLER_IDLE_INTERVAL * 2**self.idle_polls, POLLER_IDLE_MAX_INTERVAL
+            )
+            self.idle_polls += 1
+        self.next_poll_at = now + interval
+
+    def schedule_retry(self, now: float):
+        self.error_polls += 1
+        interval = POLLER_ERROR_INTERVAL * 2 ** (self.error_polls - 1)
+        self.next_poll_at = now + min(interval, POLLER_IDLE_MAX_INTERVAL)
+
+    def take_change(self) -> bool:
+        """Whether a new track was stored since the last caller asked; clears it."""
+        changed, self.changed = self.changed, False
+        return changed
+
+    def event(self) -> dict:
+        """Payload pushed to live streams."""
+        return {
+            "user_id": self.user_id,
+            "track": self.track,
+            "is_playing": self.is_playing,
+        }
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() >= self.next_poll_at
+
+
+class NowPlayingPoller:
+    """Keeps each active user's current playback fresh in the background.
+
+    Endpoints ``touch`` a user and read the cached state; the poller polls
+    Spotify per user on an adaptive schedule, so upstream load follows the
+    number of active users rather than page views. A state that is missing
+    or overdue is polled inline, with one upstream call per user in flight.
+    """
+
+    def __init__(self):
+        self.states: Dict[str, PlaybackState] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queued = set()
+        self._syncing = set()
+        # Strong references: the loop only keeps weak ones to running tasks
+        self._tasks = set()
+        self._pruned_at = time.monotonic()
+        self.history_syncs = 0
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.polls = 0
+        self.errors = 0
+        self.served_cached = 0
+
+    def touch(self, user_id: str) -> PlaybackState:
+        state = self.states.get(user_id)
+        if state is None:
+            state = self.states[user_id] = PlaybackState(user_id)
+        state.last_seen = now = time.monotonic()
+        if not self.running and now - self._pruned_at >= POLLER_PRUNE_INTERVAL:
+            self._prune(now)
+        return state
+
+    @property
+    def running(self) -> bool:
+        return bool(self._task and not self._task.done())
+
+    def _prune(self, now: float):
+        self._pruned_at = now
+        for user_id, state in list(self.states.items()):
+            if now - state.last_seen > POLLER_ACTIVE_WINDOW:
+                del self.states[user_id]
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def current(self, user_id: str) -> PlaybackState:
+        """Cached playback for ``user_id``, polling first if it is stale.
+
+        After a failed poll the last good state is served until the retry
+        is due; a user that has never polled successfully gets the same
+        error back without another upstream call.
+        """
+        state = self.touch(user_id)
+        if state.next_poll_at and not state.stale:
+            if state.polled_at:
+                self.served_cached += 1
+                return state
+            if state.failure is not None:
+                raise state.failure.with_traceback(None)
+        return await self.poll(user_id)
+
+    async def poll(self, user_id: str) -> PlaybackState:
+        inflight = self._inflight.get(user_id)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._poll(user_id))
+            self._inflight[user_id] = inflight
+            inflight.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+        return await asyncio.shield(inflight)
+
+    async def _poll(self, user_id: str) -> PlaybackState:
+        # Polling isn't activity: only requests and streams touch() a user,
+        # so users nobody asks about age out. A state pruned while this
+        # poll was queued is filled in but not put back on the schedule.
+        state = self.states.get(user_id) or PlaybackState(user_id)
+        self.polls += 1
+        now = time.monotonic()
+        try:
+            access_token = await run_in_threadpool(get_token_by_user_id, user_id)
+            sp = AsyncSpotify(access_token)
+
+            playback = await sp.current_playback()
+            item = (playback or {}).get("item")
+            was_playing = state.is_playing
+            state.in_player = bool(item)
+            state.is_playing = bool(item) and bool(playback.get("is_playing"))
+
+            changed = False
+            if item:
+                changed = await self._update_track(state, item, sp)
+            elif state.track is None:
+                await self._load_stored(state)
+                if state.track is None:
+                    # Nothing stored yet; seed from recently played
+                    recent = await sp.current_user_recently_played(limit=1)
+                    if recent and recent.get("items"):
+                        track = recent["items"][0]["track"]
+                        changed = await self._update_track(state, track, sp)
+            state.changed = state.changed or changed
+
+            if changed or state.is_playing != was_playing or not state.polled_at:
+                now_playing_hub.publish(user_id, state.event())
+
+            # A finished track shows up in recently-played; sync then, or now and then
+            if (
+                changed
+                or (was_playing and not state.is_playing)
+                or now - state.history_synced_at >= HISTORY_SYNC_INTERVAL
+            ):
+                self._sync_history(state, sp, now)
+
+            state.error = state.failure = None
+            state.error_polls = 0
+            state.polled_at = now
+            state.schedule(
+                now,
+                (playback or {}).get("progress_ms"),
+                (item or {}).get("duration_ms"),
+            )
+            return state
+        except Exception as e:
+            self.errors += 1
+            state.error = str(e)
+            state.failure = e
+            # Keep the last good playback; back off before asking Spotify again
+            state.schedule_retry(now)
+            raise
+
+    async def _load_stored(self, state: PlaybackState):
+        doc = await run_in_threadpool(find_user, state.user_id, "last_played")
+        state.track = (doc or {}).get("last_played_track") or None
+
+    async def _update_track(
+        self, state: PlaybackState, item: dict, sp: AsyncSpotify
+    ) -> bool:
+        """Store ``item`` as the user's track; returns whether it was new."""
+        if state.track and state.track.get("id") == item.get("id"):
+            return False
+        track_data = await build_track_data_async(item, sp)
+        changed = await run_in_threadpool(
+            set_last_played_track, state.user_id, track_data
+        )
+        state.track = track_data
+        return changed
+
+    def _sync_history(self, state: PlaybackState, sp: AsyncSpotify, now: float):
+        if not HISTORY_ENABLED or state.user_id in self._syncing:
+            return
+        state.history_synced_at = now
+        self._syncing.add(state.user_id)
+        self._spawn(self._sync_history_quietly(state.user_id, sp))
+
+    async def _sync_history_quietly(self, user_id: str, sp: AsyncSpotify):
+        use_background_priority()
+        try:
+            await sync_history(user_id, sp)
+            self.history_syncs += 1
+        except Exception as e:
+            print(f"⚠️ History sync failed for {user_id}: {e}")
+        finally:
+            self._syncing.discard(user_id)
+
+    async def _poll_quietly(self, user_id: str):
+        try:
+            async with self._semaphore:
+                await self.poll(user_id)
+        except Exception as e:
+            print(f"⚠️ Now-playing poll failed for {user_id}: {e}")
+        finally:
+            self._queued.discard(user_id)
+
+    async def _run(self):
+        # Scheduled polls yield to requests; polls a request waits on don't
+        use_background_priority()
+        self._semaphore = asyncio.Semaphore(POLLER_CONCURRENCY)
+        while True:
+            now = time.monotonic()
+            self._prune(now)
+            for user_id, state in list(self.states.items()):
+                if now >= state.next_poll_at and user_id not in self._queued:
+                    self._queued.add(user_id)
+                    self._spawn(self._poll_quietly(user_id))
+            await asyncio.sleep(POLLER_TICK)
+
+    def start(self):
+        if not POLLER_ENABLED or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        playing = sum(1 for s in self.states.values() if s.is_playing)
+        return {
+            "running": self.running,
+            "active_users": len(self.states),
+            "playing": playing,
+            "polls": self.polls,
+            "errors": self.errors,
+            "served_cached": self.served_cached,
+            "history_syncs": self.history_syncs,
+        }
+
+
+now_playing_poller = NowPlayingPoller()
@@ -0,0 +1,81 @@
+# services/public_cache.py
+import os
+import hashlib
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from services.cache import TTLCache
+
+PUBLIC_CACHE_TTL = int(os.getenv("PUBLIC_CACHE_TTL", 60))
+PUBLIC_CACHE_SIZE = int(os.getenv("PUBLIC_CACHE_SIZE", 5000))
+# Browsers/CDNs may reuse a response this long, then revalidate with the ETag
+PUBLIC_CACHE_MAX_AGE = int(os.getenv("PUBLIC_CACHE_MAX_AGE", 10))
+
+_responses = TTLCache(
+    maxsize=PUBLIC_CACHE_SIZE, ttl=PUBLIC_CACHE_TTL, name="public_responses"
+)
+
+# Bumped on every write to a user; older cache keys simply stop matching
+_generations = {}
+_generations_lock = threading.Lock()
+
+
+class CachedBody:
+    __slots__ = ("body", "etag", "last_modified")
+
+    def __init__(self, body: bytes, last_modified: datetime):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.last_modified = last_modified.replace(microsecond=0)
+
+
+def invalidate_public_cache(user_id: str):
+    """Drop cached public responses for ``user_id`` after their data changed."""
+    with _generations_lock:
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+
+
+def _not_modified(request: Request, entry: CachedBody) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return "*" in tags or entry.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return entry.last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def cached_public_response(
+    request: Request, user_id: str, endpoint: str, build: Callable[[], Any]
+) -> Response:
+    """Serve ``build()`` for an anonymous endpoint from a per-user cache.
+
+    The JSON body is rendered once per change and reused; requests carrying
+    a matching ``If-None-Match`` or ``If-Modified-Since`` get a bodiless 304.
+    Errors raised by ``build`` (404s and the like) are not cached.
+    """
+    key = (user_id, _generations.get(user_id, 0), endpoint)
+    entry = _responses.get(key)
+    if entry is None:
+        content = jsonable_encoder(build())
+        entry = CachedBody(JSONResponse(content).body, datetime.now(timezone.utc))
+        _responses.set(key, entry)
+
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+        "Cache-Control": f"public, max-age={PUBLIC_CACHE_MAX_AGE}",
+    }
+    if _not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,240 @@
+# services/ratelimit.py
+import os
+import re
+import time
+import math
+import random
+import asyncio
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import HTTPException
+
+# App-wide budget for Spotify Web API calls, shared by every thread
+SPOTIFY_RATE_LIMIT = float(os.getenv("SPOTIFY_RATE_LIMIT", 20))  # requests/second
+SPOTIFY_RATE_BURST = float(os.getenv("SPOTIFY_RATE_BURST", 40))
+# Share of the burst only interactive requests may use
+SPOTIFY_INTERACTIVE_RESERVE = float(os.getenv("SPOTIFY_INTERACTIVE_RESERVE", 0.5))
+# Interactive requests fail with a 429 rather than wait longer than this
+SPOTIFY_MAX_WAIT = float(os.getenv("SPOTIFY_MAX_WAIT", 10))
+# Backoff when Spotify doesn't say how long to wait
+SPOTIFY_BACKOFF_BASE = float(os.getenv("SPOTIFY_BACKOFF_BASE", 0.5))
+SPOTIFY_BACKOFF_MAX = float(os.getenv("SPOTIFY_BACKOFF_MAX", 30))
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+_priority: ContextVar[str] = ContextVar("spotify_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def spotify_priority(priority: str):
+    """Run the enclosed Spotify calls under ``priority`` (this context only)."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def use_background_priority():
+    """Mark the current task or thread's Spotify calls as background work."""
+    _priority.set(BACKGROUND)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Retry-After when Spotify sends one, else capped exponential backoff.
+
+    Both are jittered so throttled callers don't all come back at once.
+    """
+    backoff = min(SPOTIFY_BACKOFF_MAX, SPOTIFY_BACKOFF_BASE * 2**attempt)
+    try:
+        wait = float(retry_after)
+    except (TypeError, ValueError):
+        return random.uniform(backoff / 2, backoff)
+    return wait + random.uniform(0, SPOTIFY_BACKOFF_BASE)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, up to ``capacity``.
+
+    Background callers only take tokens while more than ``reserve`` remain,
+    so interactive requests always find headroom. ``throttle`` pauses every
+    caller until a 429's Retry-After has passed. Waiting happens outside the
+    lock; async callers sleep on the event loop instead of blocking it.
+    """
+
+    def __init__(
+        self, rate: float, capacity: float, reserve: float = 0, name: str = "bucket"
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = min(reserve, capacity - 1) if capacity > 1 else 0
+        self.name = name
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.acquired = {INTERACTIVE: 0, BACKGROUND: 0}
+        self.waited = {INTERACTIVE: 0.0, BACKGROUND: 0.0}
+        self.rejected = 0
+        self.throttles = 0
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def try_acquire(self, priority: str = INTERACTIVE, tokens: float = 1) -> float:
+        """Take ``tokens`` if available; otherwise return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self.rate <= 0:
+                return 0.0  # limiter disabled
+            self._refill(now)
+            floor = self.reserve if priority == BACKGROUND else 0
+            if self._tokens - tokens >= floor:
+                self._tokens -= tokens
+                self.acquired[priority] = self.acquired.get(priority, 0) + 1
+                return 0.0
+            return (tokens + floor - self._tokens) / self.rate
+
+    def _max_wait(self, priority: str) -> Optional[float]:
+        return SPOTIFY_MAX_WAIT if priority == INTERACTIVE else None
+
+    def _waited(self, priority: str, wait: float):
+        with self._lock:
+            self.waited[priority] = self.waited.get(priority, 0.0) + wait
+
+    def _reject(self, wait: float):
+        with self._lock:
+            self.rejected += 1
+        raise HTTPException(
+            status_code=429,
+            detail="Spotify rate limit reached, try again shortly",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+    def acquire(self, priority: str = None, tokens: float = 1):
+        """Block this thread until a token is free.
+
+        Sync clients must not be called from a coroutine: run them through
+        ``run_in_threadpool`` or use ``acquire_async``.
+        """
+        priority = priority or current_priority()
+        max_wait = self._max_wait(priority)
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(priority, tokens)
+            if not wait:
+                break
+            if max_wait is not None and waited + wait > max_wait:
+                self._reject(wait)
+            waited += wait
+            time.sleep(wait)
+        if waited:
+            self._waited(priority, waited)
+
+    async def acquire_async(self, priority: str = None, tokens: float = 1):
+        priority = priority or current_priority()
+        max_wait = self._max_wait(priority)
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(priority, tokens)
+            if not wait:
+                break
+            if max_wait is not None and waited + wait > max_wait:
+                self._reject(wait)
+            waited += wait
+            await asyncio.sleep(wait)
+        if waited:
+            self._waited(priority, waited)
+
+    def throttle(self, seconds: float):
+        """Hold every caller back for ``seconds`` (after a 429)."""
+        with self._lock:
+            self.throttles += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "name": self.name,
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "interactive_reserve": self.reserve,
+                "available": round(self._tokens, 2),
+                "acquired": dict(self.acquired),
+                "waited_seconds": {k: round(v, 3) for k, v in self.waited.items()},
+                "rejected": self.rejected,
+                "throttles": self.throttles,
+                "throttled_for": round(max(self._blocked_until - now, 0), 2),
+            }
+
+
+# Spotify ids are 22 base-62 characters; user ids follow "users/"
+_ID_SEGMENT = re.compile(r"^[0-9A-Za-z]{22}$")
+
+
+def endpoint_name(path: str) -> str:
+    """``/v1/playlists/<id>/tracks`` -> ``playlists/{id}/tracks``."""
+    segments = path.split("?", 1)[0].strip("/").split("/")
+    if segments and segments[0] == "v1":
+        segments = segments[1:]
+    named = []
+    for i, segment in enumerate(segments):
+        after_users = i > 0 and segments[i - 1] == "users"
+        named.append("{id}" if after_users or _ID_SEGMENT.match(segment) else segment)
+    return "/".join(named)
+
+
+class EndpointStats:
+    """Per-endpoint request, throttle and error counters for Spotify calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, path: str, status: int):
+        endpoint = endpoint_name(path)
+        with self._lock:
+            counts = self._counts.get(endpoint)
+            if counts is None:
+                counts = self._counts[endpoint] = {
+                    "requests": 0,
+                    "throttled": 0,
+                    "errors": 0,
+                }
+            counts["requests"] += 1
+            if status == 429:
+                counts["throttled"] += 1
+            elif status >= 500:
+                counts["errors"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                endpoint: dict(counts)
+                for endpoint, counts in sorted(
+                    self._counts.items(), key=lambda kv: -kv[1]["requests"]
+                )
+            }
+
+
+spotify_limiter = TokenBucket(
+    SPOTIFY_RATE_LIMIT,
+    SPOTIFY_RATE_BURST,
+    reserve=SPOTIFY_RATE_BURST * SPOTIFY_INTERACTIVE_RESERVE,
+    name="spotify",
+)
+spotify_endpoints = EndpointStats()
@@ -0,0 +1,138 @@
+# services/rollups.py
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from pymongo import UpdateOne
+
+from db.mongo import rollups_collection
+from services.music.wizard import (
+    build_genre_analysis,
+    get_parent_genre,
+    is_meta_genre,
+)
+from services.public_cache import invalidate_public_cache
+
+PERIODS = ("day", "week")
+
+# Mongo field names can't contain '.' or start with '$'
+_ESCAPES = {".": "．", "$": "＄"}
+_UNESCAPES = {v: k for k, v in _ESCAPES.items()}
+
+
+def escape_key(key: str) -> str:
+    return "".join(_ESCAPES.get(ch, ch) for ch in key)
+
+
+def unescape_key(key: str) -> str:
+    return "".join(_UNESCAPES.get(ch, ch) for ch in key)
+
+
+def bucket_start(when: datetime, period: str) -> datetime:
+    day = datetime(when.year, when.month, when.day, tzinfo=timezone.utc)
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _listen_counts(listen: dict) -> Dict[str, int]:
+    """``$inc`` fields for a single listen."""
+    inc = {"plays": 1, "ms_played": listen.get("duration_ms") or 0}
+    for artist_id in listen.get("artist_ids", [])[:1]:
+        inc[f"artists.{escape_key(artist_id)}"] = 1
+
+    parents = set()
+    for genre in listen.get("genres", []):
+        parents.add(get_parent_genre(genre))
+        genre_clean = genre.strip().lower()
+        if not is_meta_genre(genre_clean):
+            inc[f"sub_genres.{escape_key(genre_clean)}"] = 1
+    for parent in parents:
+        inc[f"meta_genres.{escape_key(parent)}"] = 1
+    return inc
+
+
+def apply_listens(user_id: str, listens: List[dict]) -> int:
+    """Fold new listens into the user's daily and weekly rollups.
+
+    Listens are summed per bucket first, so a sync costs one upsert per
+    touched day/week in a single bulk write.
+    """
+    buckets: Dict[Tuple[str, datetime], Counter] = {}
+    names: Dict[Tuple[str, datetime], Dict[str, str]] = {}
+    for listen in listens:
+        played_at = listen["played_at"]
+        counts = _listen_counts(listen)
+        for period in PERIODS:
+            key = (period, bucket_start(played_at, period))
+            buckets.setdefault(key, Counter()).update(counts)
+            if listen.get("artist_ids") and listen.get("artist"):
+                artist_id = escape_key(listen["artist_ids"][0])
+                field = f"artist_names.{artist_id}"
+                names.setdefault(key, {})[field] = listen["artist"]
+
+    if not buckets:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    ops = [
+        UpdateOne(
+            {"user_id": user_id, "period": period, "start": start},
+            {
+                "$inc": dict(counts),
+                "$set": {"updated_at": now, **names.get((period, start), {})},
+            },
+            upsert=True,
+        )
+        for (period, start), counts in buckets.items()
+    ]
+    rollups_collection.bulk_write(ops, ordered=False)
+    invalidate_public_cache(user_id)
+    return len(ops)
+
+
+def load_rollups(user_id: str, period: str, days: int) -> List[dict]:
+    since = bucket_start(datetime.now(timezone.utc) - timedelta(days=days - 1), period)
+    return list(
+        rollups_collection.find(
+            {"user_id": user_id, "period": period, "start": {"$gte": since}},
+            {"_id": 0},
+        )
+    )
+
+
+def summarize(rollups: List[dict], limit: int = 20) -> dict:
+    """Sum rollup documents into plays, top artists and genre counts."""
+    totals = {name: Counter() for name in ("artists", "meta_genres", "sub_genres")}
+    artist_names = {}
+    plays = ms_played = 0
+    for doc in rollups:
+        plays += doc.get("plays", 0)
+        ms_played += doc.get("ms_played", 0)
+        for name, counter in totals.items():
+            for key, count in (doc.get(name) or {}).items():
+                counter[unescape_key(key)] += count
+        for key, artist in (doc.get("artist_names") or {}).items():
+            artist_names[unescape_key(key)] = artist
+
+    return {
+        "plays": plays,
+        "minutes_played": round(ms_played / 60000),
+        "top_artists": [
+            {"id": artist_id, "name": artist_names.get(artist_id), "plays": count}
+            for artist_id, count in totals["artists"].most_common(limit)
+        ],
+        "meta_genres": dict(totals["meta_genres"].most_common()),
+        "sub_genres": dict(totals["sub_genres"].most_common(limit)),
+    }
+
+
+def history_genre_analysis(user_id: str, days: int = 28) -> dict:
+    """A ``genre_analysis``-shaped document built from listening rollups."""
+    period = "week" if days >= 14 else "day"
+    summary = summarize(load_rollups(user_id, period, days))
+    analysis = build_genre_analysis(summary["meta_genres"], summary["sub_genres"])
+    analysis["source"] = "history"
+    analysis["plays"] = summary["plays"]
+    analysis["days"] = days
+    return analysis
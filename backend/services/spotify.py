@@ -1,25 +1,40 @@
 # services/spotify.py
 import spotipy
-from services.token import get_token
 from services.spotify_auth import get_artist_genres
 from services.token import get_token_by_user_id
+from services.artists import ArtistGenreResolver
+from services.http import get_spotify_session, SPOTIFY_TIMEOUT
+from services.playlists import playlist_summary, PLAYLIST_FIELDS
 from datetime import datetime, timezone
 
 
+class PooledSpotify(spotipy.Spotify):
+    """spotipy client bound to the shared keep-alive session.
+
+    spotipy closes its session when a client is garbage collected, which
+    would tear down the shared pool after every request.
+    """
+
+    def __del__(self):
+        pass
+
+
+def spotify_for_token(access_token: str) -> spotipy.Spotify:
+    """Per-request client; the auth header is per client, the pool is shared."""
+    return PooledSpotify(
+        auth=access_token,
+        requests_session=get_spotify_session(),
+        requests_timeout=SPOTIFY_TIMEOUT,
+    )
+
+
 def get_spotify_client(user_id: str) -> spotipy.Spotify:
-    access_token = get_token(user_id)
-    return spotipy.Spotify(auth=access_token)
+    access_token = get_token_by_user_id(user_id)
+    return spotify_for_token(access_token)
 
 
 def enrich_playlist(sp: spotipy.Spotify, playlist_id: str) -> dict:
-    playlist = sp.playlist(playlist_id)
-    return {
-        "id": playlist["id"],
-        "name": playlist["name"],
-        "image": playlist["images"][0]["url"] if playlist["images"] else None,
-        "tracks": playlist["tracks"]["total"],
-        "external_url": playlist["external_urls"]["spotify"],
-    }
+    return playlist_summary(sp.playlist(playlist_id, fields=PLAYLIST_FIELDS))
 
 
 def simplify_track_with_genres(
@@ -35,15 +50,10 @@ def simplify_track_with_genres(
     }
 
 
-def get_spotify_client(user_id: str) -> spotipy.Spotify:
-    access_token = get_token_by_user_id(user_id)
-    return spotipy.Spotify(auth=access_token)
-
-
-def build_track_data(track, sp):
+def build_track_data(track, sp, resolver: ArtistGenreResolver = None):
     artist = track["artists"][0]
-    artist_data = sp.artist(artist["id"])
-    genres = artist_data.get("genres", [])
+    resolver = resolver or ArtistGenreResolver(sp)
+    genres = resolver.genres_for([artist])
 
     return {
         "id": track["id"],
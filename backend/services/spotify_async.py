@@ -0,0 +1,154 @@
+# services/spotify_async.py
+import os
+import asyncio
+from typing import List, Optional
+
+import httpx
+from spotipy.exceptions import SpotifyException
+
+from services.artists import ArtistGenreResolver, ARTISTS_BATCH_SIZE
+from services.spotify import build_track_data
+from services.http import SPOTIFY_CONNECT_TIMEOUT, SPOTIFY_READ_TIMEOUT, SPOTIFY_RETRIES
+from services.ratelimit import spotify_limiter, spotify_endpoints, retry_delay
+
+SPOTIFY_API_BASE = "https://api.spotify.com/v1/"
+SPOTIFY_ASYNC_POOL_SIZE = int(os.getenv("SPOTIFY_ASYNC_POOL_SIZE", 200))
+SPOTIFY_POOL_TIMEOUT = float(os.getenv("SPOTIFY_POOL_TIMEOUT", 30))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """The app-wide async HTTP client; one connection pool for every request."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=SPOTIFY_API_BASE,
+            limits=httpx.Limits(
+                max_connections=SPOTIFY_ASYNC_POOL_SIZE,
+                max_keepalive_connections=SPOTIFY_ASYNC_POOL_SIZE,
+            ),
+            timeout=httpx.Timeout(
+                SPOTIFY_READ_TIMEOUT,
+                connect=SPOTIFY_CONNECT_TIMEOUT,
+                pool=SPOTIFY_POOL_TIMEOUT,
+            ),
+        )
+    return _client
+
+
+async def close_async_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+class AsyncSpotify:
+    """asyncio counterpart of the spotipy calls the hot routes make.
+
+    Errors, including timeouts and connection failures once retries run
+    out, are raised as ``SpotifyException`` so callers can handle both
+    clients the same way.
+    """
+
+    def __init__(self, access_token: str, client: httpx.AsyncClient = None):
+        self.access_token = access_token
+        self.client = client or get_async_client()
+
+    async def _get(self, path: str, params: dict = None) -> Optional[dict]:
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        headers = {"Authorization": f"Bearer {self.access_token}"}
+
+        for attempt in range(SPOTIFY_RETRIES + 1):
+            await spotify_limiter.acquire_async()
+            try:
+                response = await self.client.get(path, params=params, headers=headers)
+            except httpx.TransportError as e:
+                # Timeouts and connection errors: retry, then fail like spotipy does
+                status = 504 if isinstance(e, httpx.TimeoutException) else 503
+                spotify_endpoints.record(path, status)
+                if attempt < SPOTIFY_RETRIES:
+                    await asyncio.sleep(retry_delay(attempt))
+                    continue
+                raise SpotifyException(
+                    status,
+                    -1,
+                    f"{SPOTIFY_API_BASE}{path}:\n {type(e).__name__}: {e}",
+                    reason=type(e).__name__,
+                ) from e
+            spotify_endpoints.record(path, response.status_code)
+            if response.status_code in (429, 500, 502, 503, 504) and (
+                attempt < SPOTIFY_RETRIES
+            ):
+                delay = retry_delay(attempt, response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    print(f"⏳ Spotify throttled {path}, backing off {delay:.1f}s")
+                    spotify_limiter.throttle(delay)
+                else:
+                    await asyncio.sleep(delay)
+                continue
+            break
+
+        if response.status_code == 204 or not response.content:
+            return None
+        if response.status_code >= 400:
+            try:
+                msg = response.json()["error"]["message"]
+            except Exception:
+                msg = response.text or "error"
+            raise SpotifyException(
+                response.status_code,
+                -1,
+                f"{response.request.url}:\n {msg}",
+                headers=dict(response.headers),
+            )
+        return response.json()
+
+    async def current_user(self) -> dict:
+        return await self._get("me")
+
+    async def current_playback(self) -> Optional[dict]:
+        return await self._get("me/player")
+
+    async def current_user_recently_played(
+        self, limit: int = 50, after: int = None, before: int = None
+    ) -> dict:
+        return await self._get(
+            "me/player/recently-played",
+            {"limit": limit, "after": after, "before": before},
+        )
+
+    async def current_user_top_artists(
+        self, limit: int = 20, offset: int = 0, time_range: str = "medium_term"
+    ) -> dict:
+        return await self._get(
+            "me/top/artists",
+            {"limit": limit, "offset": offset, "time_range": time_range},
+        )
+
+    async def current_user_top_tracks(
+        self, limit: int = 20, offset: int = 0, time_range: str = "medium_term"
+    ) -> dict:
+        return await self._get(
+            "me/top/tracks",
+            {"limit": limit, "offset": offset, "time_range": time_range},
+        )
+
+    async def current_user_playlists(self, limit: int = 50, offset: int = 0) -> dict:
+        return await self._get("me/playlists", {"limit": limit, "offset": offset})
+
+    async def playlist(self, playlist_id: str, fields: str = None) -> dict:
+        return await self._get(f"playlists/{playlist_id}", {"fields": fields})
+
+    async def artists(self, artist_ids: List[str]) -> dict:
+        return await self._get(
+            "artists", {"ids": ",".join(artist_ids[:ARTISTS_BATCH_SIZE])}
+        )
+
+
+async def build_track_data_async(track: dict, sp: AsyncSpotify) -> dict:
+    """``build_track_data`` with the artist lookup done on the async client."""
+    resolver = ArtistGenreResolver().add(track["artists"][:1])
+    await resolver.resolve_async(sp)
+    return build_track_data(track, None, resolver)
@@ -1,8 +1,11 @@
 # services/spotify_auth.py
 import os
+from functools import lru_cache
 from spotipy.oauth2 import SpotifyOAuth
+from services.artists import ArtistGenreResolver
 
 
+@lru_cache()
 def get_spotify_oauth(redirect_uri: str = None):
     return SpotifyOAuth(
         client_id=os.getenv("SPOTIFY_CLIENT_ID"),
@@ -15,11 +18,7 @@ def get_spotify_oauth(redirect_uri: str = None):
 
 
 def get_artist_genres(sp, artists, cache):
-    genres = set()
-    for artist in artists:
-        artist_id = artist["id"]
-        if artist_id not in cache:
-            artist_info = sp.artist(artist_id)
-            cache[artist_id] = artist_info.get("genres", [])
-        genres.update(cache[artist_id])
-    return list(genres)
+    # Callers that resolve many tracks pass a shared resolver instead of a dict
+    if isinstance(cache, ArtistGenreResolver):
+        return cache.genres_for(artists)
+    return ArtistGenreResolver(sp, cache).genres_for(artists)
@@ -1,78 +1,161 @@
 # services/token.py
+import os
+import time
+import threading
 from fastapi import HTTPException, Request, Depends
 from services.spotify_auth import get_spotify_oauth
+from services.cache import TTLCache
 from db.mongo import users_collection
 from services.cookie import get_user_id_from_request
 
+# Cached tokens are treated as stale this many seconds before they expire
+TOKEN_REFRESH_MARGIN = int(os.getenv("TOKEN_REFRESH_MARGIN", 60))
 
-def get_token(request: Request) -> str:
-    user_id = get_user_id_from_request(request)
+# Background refresh of tokens for users seen recently
+TOKEN_BACKGROUND_REFRESH = os.getenv("TOKEN_BACKGROUND_REFRESH", "1") == "1"
+TOKEN_PREFETCH_WINDOW = int(os.getenv("TOKEN_PREFETCH_WINDOW", 300))
+TOKEN_PREFETCH_ACTIVE = int(os.getenv("TOKEN_PREFETCH_ACTIVE", 900))
+TOKEN_REFRESH_INTERVAL = int(os.getenv("TOKEN_REFRESH_INTERVAL", 60))
+
+_token_cache = TTLCache(
+    maxsize=int(os.getenv("TOKEN_CACHE_SIZE", 10000)), ttl=3600, name="tokens"
+)
+
+TOKEN_PROJECTION = {"_id": 0, "access_token": 1, "refresh_token": 1, "expires_at": 1}
+
+# Concurrent requests for a user share a single refresh. Users hash onto a
+# fixed set of lock stripes so memory stays flat however many are loaded.
+TOKEN_LOCK_STRIPES = int(os.getenv("TOKEN_LOCK_STRIPES", 256))
+_user_locks = [threading.Lock() for _ in range(max(TOKEN_LOCK_STRIPES, 1))]
 
-    user = users_collection.find_one({"user_id": user_id})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found in database")
+_refresher_stop = threading.Event()
+_refresher_thread = None
 
-    token_info = {
-        "access_token": user.get("access_token"),
-        "refresh_token": user.get("refresh_token"),
-        "expires_at": user.get("expires_at"),
-    }
 
-    if not all(token_info.values()):
-        raise HTTPException(status_code=400, detail="User token info incomplete")
+def _user_lock(user_id: str) -> threading.Lock:
+    return _user_locks[hash(user_id) % len(_user_locks)]
 
-    sp_oauth = get_spotify_oauth()
 
-    if sp_oauth.is_token_expired(token_info):
-        refreshed = sp_oauth.refresh_access_token(user["refresh_token"])
-        users_collection.update_one(
-            {"user_id": user_id},
-            {
-                "$set": {
-                    "access_token": refreshed["access_token"],
-                    "refresh_token": refreshed["refresh_token"],
-                    "expires_at": refreshed["expires_at"],
-                }
-            },
-        )
-        return refreshed["access_token"]
+def cache_token(user_id: str, token_info: dict, last_used: float = None):
+    """Remember a user's token until shortly before it expires."""
+    ttl = token_info["expires_at"] - int(time.time()) - TOKEN_REFRESH_MARGIN
+    if ttl > 0:
+        entry = dict(token_info, last_used=last_used or time.time())
+        _token_cache.set(user_id, entry, ttl=ttl)
+    else:
+        _token_cache.pop(user_id)
 
-    return token_info["access_token"]
+
+def invalidate_token(user_id: str):
+    _token_cache.pop(user_id)
+
+
+def get_token(request: Request) -> str:
+    user_id = get_user_id_from_request(request)
+    return get_token_by_user_id(user_id)
 
 
 def refresh_user_token(user_id: str) -> dict:
-    _ = get_token(user_id)
+    _ = get_token_by_user_id(user_id)
     return {"status": "ok"}
 
 
-def get_token_by_user_id(user_id: str) -> str:
-    user = users_collection.find_one({"user_id": user_id})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    token_info = {
-        "access_token": user.get("access_token"),
-        "refresh_token": user.get("refresh_token"),
-        "expires_at": user.get("expires_at"),
-    }
-
-    if not all(token_info.values()):
-        raise HTTPException(status_code=400, detail="Token info incomplete")
-
-    sp_oauth = get_spotify_oauth()
-
-    if sp_oauth.is_token_expired(token_info):
-        refreshed = sp_oauth.refresh_access_token(user["refresh_token"])
-        users_collection.update_one(
-            {"user_id": user_id},
-            {
-                "$set": {
-                    "access_token": refreshed["access_token"],
-                    "refresh_token": refreshed["refresh_token"],
-                    "expires_at": refreshed["expires_at"],
-                }
-            },
-        )
-        return refreshed["access_token"]
-
-    return token_info["access_token"]
+def get_token_by_user_id(user_id: str, remember: bool = True) -> str:
+    """A valid access token for ``user_id``, refreshed if it has expired.
+
+    Background jobs pass ``remember=False`` so sweeping every user neither
+    counts as activity nor pushes active users out of the token cache.
+    """
+    cached = _token_cache.get(user_id)
+    if cached:
+        if remember:
+            cached["last_used"] = time.time()
+        return cached["access_token"]
+
+    return _load_token(user_id, remember=remember)["access_token"]
+
+
+def _load_token(
+    user_id: str, force_refresh: bool = False, remember: bool = True
+) -> dict:
+    """Single-flight load/refresh: one caller per user talks to Mongo and
+    Spotify, everyone else waiting on the lock reuses its result."""
+    with _user_lock(user_id):
+        cached = _token_cache.get(user_id)
+        if cached and not force_refresh:
+            return cached
+
+        user = users_collection.find_one({"user_id": user_id}, TOKEN_PROJECTION)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        token_info = {
+            "access_token": user.get("access_token"),
+            "refresh_token": user.get("refresh_token"),
+            "expires_at": user.get("expires_at"),
+        }
+
+        if not all(token_info.values()):
+            raise HTTPException(status_code=400, detail="Token info incomplete")
+
+        sp_oauth = get_spotify_oauth()
+        remaining = token_info["expires_at"] - int(time.time())
+
+        # Another process may already have refreshed; only force if still close
+        if sp_oauth.is_token_expired(token_info) or (
+            force_refresh and remaining < TOKEN_PREFETCH_WINDOW
+        ):
+            refreshed = sp_oauth.refresh_access_token(token_info["refresh_token"])
+            token_info = {
+                "access_token": refreshed["access_token"],
+                "refresh_token": refreshed["refresh_token"],
+                "expires_at": refreshed["expires_at"],
+            }
+            users_collection.update_one({"user_id": user_id}, {"$set": token_info})
+
+        # Background refreshes must not count as activity
+        last_used = cached.get("last_used") if cached and force_refresh else None
+        if remember:
+            cache_token(user_id, token_info, last_used)
+        return token_info
+
+
+def refresh_expiring_tokens() -> int:
+    """Refresh cached tokens of recently active users before they expire."""
+    now = time.time()
+    refreshed = 0
+    for user_id, info in _token_cache.items():
+        if now - info.get("last_used", 0) > TOKEN_PREFETCH_ACTIVE:
+            continue
+        if info["expires_at"] - now > TOKEN_PREFETCH_WINDOW:
+            continue
+        try:
+            _load_token(user_id, force_refresh=True)
+            refreshed += 1
+        except Exception as e:
+            print(f"⚠️ Background token refresh failed for {user_id}: {e}")
+    return refreshed
+
+
+def _refresh_loop():
+    while not _refresher_stop.wait(TOKEN_REFRESH_INTERVAL):
+        count = refresh_expiring_tokens()
+        if count:
+            print(f"🔄 Refreshed {count} expiring tokens in background")
+
+
+def start_token_refresher():
+    global _refresher_thread
+    if not TOKEN_BACKGROUND_REFRESH:
+        return
+    if _refresher_thread and _refresher_thread.is_alive():
+        return
+    _refresher_stop.clear()
+    _refresher_thread = threading.Thread(
+        target=_refresh_loop, name="token-refresher", daemon=True
+    )
+    _refresher_thread.start()
+
+
+def stop_token_refresher():
+    _refresher_stop.set()
@@ -0,0 +1,42 @@
+# tests/conftest.py
+"""Run the app against an in-memory mongomock database.
+
+Run from backend/:  pip install pytest mongomock && python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+import pymongo  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost")
+os.environ.setdefault("SPOTIFY_CLIENT_ID", "test-client")
+os.environ.setdefault("SPOTIFY_CLIENT_SECRET", "test-secret")
+os.environ.setdefault("PRO_CALLBACK", "http://localhost/callback")
+os.environ.setdefault("POLLER_ENABLED", "0")
+
+# db.mongo builds its client at import time, so swap the class first
+pymongo.MongoClient = mongomock.MongoClient
+
+
+@pytest.fixture
+def users():
+    from db.mongo import users_collection
+
+    users_collection.delete_many({})
+    yield users_collection
+    users_collection.delete_many({})
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    return TestClient(main.app)
@@ -0,0 +1,43 @@
+# tests/test_auth.py
+import asyncio
+import base64
+import json
+import time
+
+from api import auth
+
+
+def _off_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return True
+    return False
+
+
+class FakeOAuth:
+    def get_access_token(self, code, as_dict=True):
+        assert _off_event_loop(), "token exchange ran on the event loop"
+        return {
+            "access_token": "access",
+            "refresh_token": "refresh",
+            "expires_at": int(time.time()) + 3600,
+        }
+
+
+class FakeSpotify:
+    def current_user(self):
+        assert _off_event_loop(), "profile fetch ran on the event loop"
+        return {"id": "newcomer"}
+
+
+def test_callback_calls_spotify_off_the_event_loop(client, users, monkeypatch):
+    monkeypatch.setattr(auth, "get_spotify_oauth", lambda uri=None: FakeOAuth())
+    monkeypatch.setattr(auth, "spotify_for_token", lambda token: FakeSpotify())
+    state = base64.urlsafe_b64encode(
+        json.dumps({"redirect_uri": "http://localhost/home"}).encode()
+    ).decode()
+
+    response = client.get(f"/callback?code=abc&state={state}", follow_redirects=False)
+    assert response.status_code == 307
+    assert users.find_one({"user_id": "newcomer"})["refresh_token"] == "refresh"
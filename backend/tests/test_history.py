@@ -0,0 +1,87 @@
+# tests/test_history.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services import history
+from services.cookie import encode
+
+
+@pytest.fixture
+def listens():
+    from db.mongo import history_collection
+
+    start = datetime(2024, 5, 1, 12, 0, 0, 123000, tzinfo=timezone.utc)
+    history_collection.delete_many({})
+    history_collection.insert_many(
+        {
+            "user_id": "listener",
+            "track_id": f"t{i}",
+            "genres": [],
+            "played_at": start + timedelta(minutes=i),
+        }
+        for i in range(5)
+    )
+    yield
+    history_collection.delete_many({})
+
+
+def _page(client, query=""):
+    client.cookies.set("sinatra_user_id", encode("listener"))
+    response = client.get(f"/history?limit=2{query}")
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_next_before_pages_through_unencoded(client, listens):
+    seen, query = [], ""
+    while True:
+        page = _page(client, query)
+        seen += [item["track_id"] for item in page["items"]]
+        if not page["next_before"]:
+            break
+        assert page["next_before"].endswith("Z")
+        query = f"&before={page['next_before']}"
+    assert seen == ["t4", "t3", "t2", "t1", "t0"]
+
+
+def test_before_accepts_decoded_plus_offset(client, listens):
+    # "+00:00" sent without encoding arrives as " 00:00"
+    page = _page(client, "&before=2024-05-01T12:03:00.123+00:00")
+    assert [item["track_id"] for item in page["items"]] == ["t2", "t1"]
+
+
+def _listens(n):
+    start = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    return [
+        {
+            "user_id": "u1",
+            "track_id": f"t{i}",
+            "played_at": start + timedelta(minutes=i),
+        }
+        for i in range(n)
+    ]
+
+
+def test_replayed_sync_stores_and_counts_listens_once(users, monkeypatch):
+    from db.mongo import history_collection
+
+    history_collection.delete_many({})
+    users.insert_one({"user_id": "u1"})
+    rolled_up = []
+    monkeypatch.setattr(history, "apply_listens", lambda u, d: rolled_up.extend(d))
+
+    # The cursor update fails after the insert, so the next sync replays the page
+    update_one = users.update_one
+    monkeypatch.setattr(users, "update_one", lambda *a, **k: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        history._store("u1", _listens(2), 1)
+    monkeypatch.setattr(users, "update_one", update_one)
+
+    inserted = history._store("u1", _listens(3), 2)
+
+    assert [d["track_id"] for d in inserted] == ["t2"]
+    assert history_collection.count_documents({"user_id": "u1"}) == 3
+    assert [d["track_id"] for d in rolled_up] == ["t0", "t1", "t2"]
+    assert users.find_one({"user_id": "u1"})["history_cursor"] == 2
+    history_collection.delete_many({})
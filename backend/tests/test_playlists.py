@@ -0,0 +1,53 @@
+# tests/test_playlists.py
+from types import SimpleNamespace
+
+import pytest
+
+from services.playlists import add_selected_playlists
+
+
+@pytest.fixture(autouse=True)
+def sequential_bulk_write(users, monkeypatch):
+    """mongomock's bulk_write doesn't accept current pymongo's UpdateOne."""
+
+    def bulk_write(ops, ordered=True):
+        modified = 0
+        for op in ops:
+            result = users.update_one(op._filter, op._doc, upsert=op._upsert)
+            modified += result.modified_count
+        return SimpleNamespace(modified_count=modified)
+
+    monkeypatch.setattr(users, "bulk_write", bulk_write)
+
+
+def _entry(playlist_id, snapshot_id, name="Mix"):
+    return {"id": playlist_id, "name": name, "snapshot_id": snapshot_id}
+
+
+def _stored(users, user_id):
+    return users.find_one({"user_id": user_id})["playlists"]["all"]
+
+
+def test_readding_a_playlist_updates_it_in_place(users):
+    old = {"id": "p1", "name": "Old", "tracks": 3, "pinned": True}
+    users.insert_one({"user_id": "u1", "playlists": {"all": [old]}})
+
+    add_selected_playlists("u1", [_entry("p1", "s2"), _entry("p2", "s1")])
+    add_selected_playlists("u1", [_entry("p1", "s3")])
+
+    stored = _stored(users, "u1")
+    assert [p["id"] for p in stored] == ["p1", "p2"]
+    assert stored[0] == {
+        "id": "p1",
+        "name": "Mix",
+        "tracks": 3,
+        "pinned": True,
+        "snapshot_id": "s3",
+    }
+
+
+def test_adding_for_a_new_user(users):
+    add_selected_playlists("new", [_entry("p1", "s1")])
+    add_selected_playlists("new", [_entry("p1", "s1")])
+    assert _stored(users, "new") == [_entry("p1", "s1")]
+    assert users.count_documents({"user_id": "new"}) == 1
@@ -0,0 +1,115 @@
+# tests/test_poller.py
+import asyncio
+
+import pytest
+
+from services import poller as poller_module
+from services.poller import NowPlayingPoller
+
+
+class FakeSpotify:
+    calls = 0
+    fail = False
+    track_id = "t1"
+
+    def __init__(self, access_token):
+        pass
+
+    async def current_playback(self):
+        FakeSpotify.calls += 1
+        if FakeSpotify.fail:
+            raise RuntimeError("spotify down")
+        item = {"id": FakeSpotify.track_id, "duration_ms": 200000}
+        return {"is_playing": True, "progress_ms": 0, "item": item}
+
+
+@pytest.fixture
+def poller(monkeypatch):
+    FakeSpotify.calls, FakeSpotify.fail, FakeSpotify.track_id = 0, False, "t1"
+
+    async def build_track(item, sp):
+        return {"id": item["id"]}
+
+    monkeypatch.setattr(poller_module, "AsyncSpotify", FakeSpotify)
+    monkeypatch.setattr(poller_module, "get_token_by_user_id", lambda user_id: "tok")
+    monkeypatch.setattr(poller_module, "build_track_data_async", build_track)
+    monkeypatch.setattr(poller_module, "set_last_played_track", lambda *a: True)
+    monkeypatch.setattr(poller_module, "HISTORY_ENABLED", False)
+    return NowPlayingPoller()
+
+
+def test_change_is_reported_once(poller):
+    async def run():
+        state = await poller.current("u1")
+        first = state.take_change()
+        state = await poller.current("u1")  # cached, no new poll
+        return first, state.take_change()
+
+    assert asyncio.run(run()) == (True, False)
+    assert FakeSpotify.calls == 1
+
+
+def test_errors_back_off_and_serve_stale_state(poller):
+    async def run():
+        await poller.current("u1")
+        state = poller.states["u1"]
+        state.next_poll_at = 0  # due
+        FakeSpotify.fail = True
+        with pytest.raises(RuntimeError):
+            await poller.current("u1")
+        for _ in range(5):
+            state = await poller.current("u1")
+        return state
+
+    state = asyncio.run(run())
+    assert state.track == {"id": "t1"}
+    assert state.error == "spotify down"
+    assert FakeSpotify.calls == 2
+
+
+def test_failing_unknown_user_is_not_polled_per_request(poller):
+    FakeSpotify.fail = True
+
+    async def run():
+        for _ in range(5):
+            with pytest.raises(RuntimeError):
+                await poller.current("nobody")
+
+    asyncio.run(run())
+    assert FakeSpotify.calls == 1
+
+
+def test_inactive_users_pruned_without_background_loop(poller):
+    poller.touch("old").last_seen -= poller_module.POLLER_ACTIVE_WINDOW + 1
+    poller._pruned_at -= poller_module.POLLER_PRUNE_INTERVAL
+    poller.touch("new")
+    assert set(poller.states) == {"new"}
+
+
+def test_users_without_requests_are_pruned_while_loop_runs(poller, monkeypatch):
+    monkeypatch.setattr(poller_module, "POLLER_ENABLED", True)
+    monkeypatch.setattr(poller_module, "POLLER_TICK", 0.01)
+    monkeypatch.setattr(poller_module, "POLLER_ACTIVE_WINDOW", 0.2)
+    monkeypatch.setattr(poller_module, "POLLER_PLAYING_INTERVAL", 0.01)
+    monkeypatch.setattr(poller_module, "MIN_INTERVAL", 0.01)
+
+    async def run():
+        await poller.current("u1")
+        poller.start()
+        await asyncio.sleep(0.5)
+        await poller.stop()
+
+    asyncio.run(run())
+    assert FakeSpotify.calls > 1  # polled in the background...
+    assert "u1" not in poller.states  # ...but dropped once nobody asked
+
+
+def test_public_reads_leave_owner_change_flag(poller, client, monkeypatch):
+    from api import public
+
+    monkeypatch.setattr(public, "now_playing_poller", poller)
+    played = client.get("/public-played/u1", params={"last_track_id": "t1"})
+    assert played.json()["status"] == "unchanged"
+    updated = client.post("/public-update-playing/u1")
+    assert updated.json()["status"] == "updated"
+    assert poller.states["u1"].take_change()
@@ -0,0 +1,45 @@
+# tests/test_spotify_async.py
+import asyncio
+
+import httpx
+import pytest
+from spotipy.exceptions import SpotifyException
+
+from services import spotify_async
+from services.spotify_async import AsyncSpotify
+
+
+def _client(handler):
+    return httpx.AsyncClient(
+        transport=httpx.MockTransport(handler),
+        base_url=spotify_async.SPOTIFY_API_BASE,
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(spotify_async, "retry_delay", lambda *a: 0)
+
+
+def test_transport_errors_are_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection reset", request=request)
+        return httpx.Response(200, json={"id": "me"})
+
+    sp = AsyncSpotify("tok", _client(handler))
+    assert asyncio.run(sp.current_user()) == {"id": "me"}
+    assert len(calls) == 2
+
+
+def test_timeouts_raise_spotify_exception():
+    def handler(request):
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    sp = AsyncSpotify("tok", _client(handler))
+    with pytest.raises(SpotifyException) as excinfo:
+        asyncio.run(sp.current_playback())
+    assert excinfo.value.http_status == 504
@@ -0,0 +1,44 @@
+# tests/test_telemetry.py
+import random
+import threading
+
+from services.music.telemetry import HeavyHitters
+
+
+def _reference(keys, capacity):
+    """Space-Saving with a plain min() scan."""
+    counts = {}
+    for key in keys:
+        if key in counts:
+            counts[key] += 1
+        elif len(counts) < capacity:
+            counts[key] = 1
+        else:
+            victim = min(counts, key=lambda k: (counts[k], k))
+            counts[key] = counts.pop(victim) + 1
+    return counts
+
+
+def test_eviction_matches_min_scan():
+    rng = random.Random(7)
+    keys = [f"g{int(rng.paretovariate(1.2))}" for _ in range(5000)]
+    hitters = HeavyHitters(capacity=20)
+    for key in keys:
+        hitters.add(key)
+    assert {k: c for k, c, _ in hitters.top(20)} == _reference(keys, 20)
+    assert len(hitters._heap) <= 4 * hitters.capacity
+
+
+def test_concurrent_adds_are_all_counted():
+    hitters = HeavyHitters(capacity=10, sample_rate=0.5)
+
+    def work():
+        for i in range(2000):
+            hitters.add(f"g{i % 30}")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert hitters.stats()["seen"] == 16000
@@ -0,0 +1,55 @@
+# tests/test_user_projections.py
+"""An existing user without the projected fields is not "user not found"."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from db.projections import PROJECTIONS
+from db.users import find_user
+from services.cookie import encode
+
+
+@pytest.fixture
+def bare_user(users):
+    users.insert_one({"user_id": "bare", "display_name": "Bare", "theme": "default"})
+    return "bare"
+
+
+@pytest.mark.parametrize("view", sorted(PROJECTIONS))
+def test_every_view_finds_existing_user(bare_user, view):
+    assert find_user(bare_user, view) is not None
+    assert find_user("missing", view) is None
+
+
+def test_public_track_without_last_played(client, bare_user):
+    response = client.get(f"/public-track/{bare_user}")
+    assert response.status_code == 200
+    assert response.json() == {"track": None}
+
+
+def test_public_track_unknown_user(client, users):
+    assert client.get("/public-track/missing").status_code == 404
+
+
+def test_dashboard_without_playlists_or_track(client, users):
+    # Stored analysis so /dashboard doesn't need Spotify for genres
+    users.insert_one(
+        {
+            "user_id": "fresh",
+            "genre_analysis": {"meta_genres": {}, "sub_genres": {}},
+            "genre_last_updated": datetime.now(timezone.utc),
+        }
+    )
+    client.cookies.set("sinatra_user_id", encode("fresh"))
+    response = client.get("/dashboard")
+    assert response.status_code == 200
+    assert response.json()["playlists"] == {"all": [], "featured": []}
+
+
+def test_update_featured_without_playlists(client, bare_user):
+    response = client.post(
+        "/update-featured", json={"user_id": bare_user, "playlist_ids": ["p1"]}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok", "count": 0}
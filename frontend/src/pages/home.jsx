@@ -1,8 +1,15 @@
 // src/pages/home.jsx
-import React, { useEffect, useState, lazy, Suspense, useMemo } from 'react';
+import React, {
+  useEffect,
+  useState,
+  useRef,
+  lazy,
+  Suspense,
+  useMemo,
+} from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useUser } from '../context/UserContext';
-import { apiGet, apiDelete, apiPost } from '../utils/api';
+import { apiGet, apiDelete, apiPost, apiStream } from '../utils/api';
 import { Menu, Share } from 'lucide-react';
 import { motion } from '@motionone/react';
 import { apiLogout } from '../utils/api';
@@ -23,6 +30,7 @@ function Home() {
   const { user, loading, setUser } = useUser();
 
   const [track, setTrack] = useState(user?.last_played || null);
+  const trackRef = useRef(track);
   const [lastUpdated, setLastUpdated] = useState(() => {
     const localTime = localStorage.getItem('last_played_updated_at');
     return localTime
@@ -62,21 +70,60 @@ function Home() {
   useEffect(() => {
     if (user?.last_played) {
       setTrack(user.last_played);
+      trackRef.current = user.last_played;
       const ts = user.last_played.timestamp;
       setLastUpdated(ts ? new Date(ts) : new Date());
     }
   }, [user?.last_played]);
 
   useEffect(() => {
-    const interval = setInterval(() => {
-      if (document.visibilityState === 'visible') {
-        loadNowPlaying();
-      }
-    }, 20000); // 20 seconds
+    // Live updates pushed by the server; poll where SSE is unavailable or fails
+    let interval = null;
+    const startPolling = () => {
+      if (interval) return;
+      interval = setInterval(() => {
+        if (document.visibilityState === 'visible') {
+          loadNowPlaying();
+        }
+      }, 20000); // 20 seconds
+    };
+
+    const source = apiStream(`/stream/now-playing`, (event) => {
+      if (event.track) showTrack(event.track);
+    });
+    if (source) {
+      // A non-200 (500, 429, expired cookie) closes the stream for good
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) {
+          source.close();
+          startPolling();
+        }
+      };
+    } else {
+      startPolling();
+    }
 
-    return () => clearInterval(interval);
+    return () => {
+      if (source) source.close();
+      clearInterval(interval);
+    };
   }, [user]);
 
+  function showTrack(latestTrack) {
+    // Read through a ref: the stream callback outlives the render it came from
+    const isSame =
+      JSON.stringify(latestTrack) === JSON.stringify(trackRef.current);
+    if (isSame) return;
+
+    trackRef.current = latestTrack;
+    setAnimateTrackChange(true);
+    setTrack(latestTrack);
+    setLastUpdated(new Date());
+    localStorage.setItem('last_played_track', JSON.stringify(latestTrack));
+    localStorage.setItem('last_played_updated_at', new Date().toISOString());
+    setTimeout(() => setAnimateTrackChange(false), 500);
+  }
+
   async function loadNowPlaying() {
     setIsRefreshing(true);
     try {
@@ -92,18 +139,7 @@ function Home() {
 
       if (!latestTrack) return;
 
-      const isSame = JSON.stringify(latestTrack) === JSON.stringify(track);
-      if (!isSame) {
-        setAnimateTrackChange(true);
-        setTrack(latestTrack);
-        setLastUpdated(new Date());
-        localStorage.setItem('last_played_track', JSON.stringify(latestTrack));
-        localStorage.setItem(
-          'last_played_updated_at',
-          new Date().toISOString()
-        );
-        setTimeout(() => setAnimateTrackChange(false), 500);
-      }
+      showTrack(latestTrack);
     } catch (err) {
       console.error('Error during loadNowPlaying():', err);
     } finally {
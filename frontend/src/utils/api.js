@@ -63,3 +63,13 @@ export async function apiLogout() {
 
   return await res.json();
 }
+
+export function apiStream(path, onEvent, event = 'track') {
+  if (typeof EventSource === 'undefined') return null;
+
+  const source = new EventSource(`${BASE_URL}${path}`, {
+    withCredentials: true,
+  });
+  source.addEventListener(event, (e) => onEvent(JSON.parse(e.data)));
+  return source;
+}